@@ -1,4 +1,5 @@
 # app.py
+import os
 from flask import Flask, send_from_directory
 from user.views import blueprint  # ← 改成 blueprint
 from student.views import blueprint as student_blueprint  # 新增：导入学生蓝图
@@ -6,12 +7,38 @@ from college_admin.views import blueprint as college_admin_blueprint  # 新增
 from university_admin.views import blueprint as university_admin_blueprint  # 新增：导入大学管理员蓝图
 from config import Config
 from user.models import db
+from common.db_pool import engine_options, pool_monitor
+from common.db_routing import REPLICA_BIND_KEY, init_replica_routing
+from common.query_stats import init_query_stats
+from common.slow_query import init_slow_query_log
+from common.metrics import init_metrics
+from common.profiler import init_profiler
+from common.password_hashing import init_password_hashing
+from common.auth_token import init_auth_token
+from common.soft_delete import init_soft_delete
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-
+    base_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], base_options)
+    replica_uri = app.config.get('DB_REPLICA_URI')
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND_KEY: dict(engine_options(replica_uri, base_options), url=replica_uri)
+        }
+
+    init_auth_token(app)
+    init_metrics(app)
+    init_profiler(app)
+    init_password_hashing(app)
     db.init_app(app)
+    with app.app_context():
+        pool_monitor.attach(db.engine)
+    init_replica_routing(app, db)
+    init_query_stats(app)
+    init_slow_query_log(app)
+    init_soft_delete(app)
 
     # 注册蓝图
     app.register_blueprint(blueprint)  # ← 这里也用 blueprint
@@ -80,5 +107,7 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    # 本地调试入口：在 create_app 之前打开调试模式，未配置签名密钥时使用临时密钥而不是拒绝启动
+    os.environ.setdefault('FLASK_DEBUG', '1')
     app = create_app()
     app.run(debug=True, port=5000)
\ No newline at end of file
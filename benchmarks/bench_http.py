@@ -0,0 +1,342 @@
+# benchmarks/bench_http.py
+"""
+HTTP 接口压测：用 Flask test client 驱动完整应用（路由、请求钩子、仓储、数据库），
+在固定 seed 生成的数据集上依次跑热点场景，输出各场景吞吐与 p50/p95/p99 延迟（JSON），
+并可与保存的基线对比，超出容差时以非 0 状态退出。
+
+场景：
+    login            POST /user/api/login
+    search           GET  /user/api/search?title=...
+    paper_click      GET  /user/api/paper/<id> + POST /user/api/record-paper-click（一次计一组）
+    admin_papers     GET  /university_admin/api/papers、/college_admin/api/papers 分页
+    admin_users      GET  /university_admin/api/users 分页
+    overview_stats   概览页统计（分类 / 年份 / 学院点击 / 学院仪表板）
+
+用法：
+    python benchmarks/bench_http.py --save-baseline benchmarks/http_baseline.json
+    python benchmarks/bench_http.py --baseline benchmarks/http_baseline.json --tolerance 0.2
+    python benchmarks/bench_http.py --scenarios search,admin_papers --requests 1000 --threads 4
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VOCAB = (
+    "learning deep neural network graph model attention transformer language vision robust "
+    "optimization stochastic gradient federated privacy quantum reinforcement policy generative "
+    "diffusion retrieval embedding contrastive sparse efficient inference benchmark dataset"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="HTTP 接口压测")
+    parser.add_argument("--db-uri", default=None, help="压测数据库（会被清空重建），默认临时目录下的 SQLite 文件")
+    parser.add_argument("--colleges", type=int, default=10)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--papers", type=int, default=5000)
+    parser.add_argument("--clicks", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="逗号分隔的场景名，默认全部")
+    parser.add_argument("--requests", type=int, default=300, help="每个场景每个线程的请求（组）数")
+    parser.add_argument("--warmup", type=int, default=20, help="每个场景正式计时前的预热请求数")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--output", default=None, help="结果 JSON 写入该文件（默认只打印）")
+    parser.add_argument("--baseline", default=None, help="与该基线 JSON 对比")
+    parser.add_argument("--save-baseline", default=None, help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="允许的退化比例：p95 变慢或吞吐下降超过该比例视为退化")
+    return parser.parse_args()
+
+
+# ======================
+# 数据准备
+# ======================
+
+def build_app(db_uri):
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = db_uri
+    # 基准进程内自行签发和校验令牌，未配置密钥时用固定值
+    Config.AUTH_TOKEN_SECRET = Config.AUTH_TOKEN_SECRET or "benchmark-secret"
+    from app import create_app
+    app = create_app()
+    # N+1 告警等日志会干扰计时和输出
+    app.logger.setLevel(logging.ERROR)
+    return app
+
+
+def seed(db, args):
+    """按 seed 生成学院 / 用户 / 分类 / 论文 / 点击，返回场景需要的 id 信息"""
+    from user.models import College, User, Category, Paper, PaperClick, Role
+    from common.auth_token import issue_token, TokenIdentity
+
+    rng = random.Random(args.seed)
+    db.drop_all()
+    db.create_all()
+
+    db.session.execute(College.__table__.insert(), [
+        {"college_id": i, "college_name": f"学院{i}", "code": f"C{i}"} for i in range(1, args.colleges + 1)
+    ])
+    db.session.execute(Category.__table__.insert(), [
+        {"category_id": i, "code": f"cs.B{i}", "name": f"Bench {i}"} for i in range(1, 21)
+    ])
+
+    users = [{"user_id": 1, "username": "bench_uni_admin", "password_hash": "123456", "real_name": "大学管理员",
+              "role": Role.UNIVERSITY_ADMIN, "college_id": 1}]
+    for cid in range(1, args.colleges + 1):
+        users.append({"user_id": len(users) + 1, "username": f"bench_col_admin_{cid}", "password_hash": "123456",
+                      "real_name": f"学院管理员{cid}", "role": Role.COLLEGE_ADMIN, "college_id": cid})
+    students = []
+    for _ in range(args.users):
+        uid = len(users) + 1
+        student = {"user_id": uid, "username": f"bench_{uid}", "password_hash": "123456",
+                   "real_name": f"学生{uid}", "role": Role.STUDENT, "college_id": rng.randint(1, args.colleges)}
+        users.append(student)
+        students.append(student)
+    db.session.execute(User.__table__.insert(), users)
+
+    now = datetime.utcnow()
+    db.session.execute(Paper.__table__.insert(), [
+        {"paper_id": i, "title": " ".join(rng.sample(VOCAB, 6)).capitalize(), "arxiv_id": f"bench.{i:07d}",
+         "category_id": rng.randint(1, 20), "abstract": " ".join(rng.choices(VOCAB, k=40)),
+         "pdf_url": f"https://arxiv.org/pdf/bench.{i:07d}",
+         "created_at": now - timedelta(days=rng.randint(0, 1500))}
+        for i in range(1, args.papers + 1)
+    ])
+
+    batch = []
+    for click_id in range(1, args.clicks + 1):
+        student = students[rng.randrange(len(students))]
+        batch.append({"click_id": click_id, "user_id": student["user_id"], "paper_id": rng.randint(1, args.papers),
+                      "college_id": student["college_id"],
+                      "click_time": now - timedelta(minutes=rng.randint(2, 60 * 24 * 90))})
+        if len(batch) >= 50000:
+            db.session.execute(PaperClick.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(PaperClick.__table__.insert(), batch)
+    db.session.commit()
+
+    # 接口按令牌识别用户：预先签发，不把签名计入请求耗时
+    return {
+        "students": [(s["user_id"], s["username"], s["college_id"]) for s in students],
+        "tokens": {s["user_id"]: issue_token(TokenIdentity(s["user_id"], Role.STUDENT, s["college_id"], 0))
+                   for s in students},
+        "admin_headers": {"Authorization": "Bearer " + issue_token(TokenIdentity(1, Role.UNIVERSITY_ADMIN, 1, 0))},
+        "papers": args.papers,
+        "colleges": args.colleges,
+    }
+
+
+# ======================
+# 场景：每个函数发出一组请求，返回状态码列表
+# ======================
+
+def scenario_login(client, rng, data):
+    _, username, _ = rng.choice(data["students"])
+    resp = client.post("/user/api/login", json={"username": username, "password": "123456"})
+    return [resp.status_code]
+
+
+def scenario_search(client, rng, data):
+    resp = client.get("/user/api/search", query_string={"title": rng.choice(VOCAB)})
+    return [resp.status_code]
+
+
+def scenario_paper_click(client, rng, data):
+    user_id, _, college_id = rng.choice(data["students"])
+    paper_id = rng.randint(1, data["papers"])
+    detail = client.get(f"/user/api/paper/{paper_id}")
+    click = client.post("/user/api/record-paper-click",
+                        json={"paper_id": paper_id, "college_id": college_id},
+                        headers={"Authorization": f"Bearer {data['tokens'][user_id]}"})
+    return [detail.status_code, click.status_code]
+
+
+def scenario_admin_papers(client, rng, data):
+    page = rng.randint(1, max(1, min(50, data["papers"] // 20)))
+    prefix = rng.choice(("/university_admin", "/college_admin"))
+    resp = client.get(f"{prefix}/api/papers", query_string={"page": page, "per_page": 20},
+                      headers=data["admin_headers"])
+    return [resp.status_code]
+
+
+def scenario_admin_users(client, rng, data):
+    page = rng.randint(1, max(1, min(50, len(data["students"]) // 20)))
+    resp = client.get("/university_admin/api/users", query_string={"page": page, "per_page": 20},
+                      headers=data["admin_headers"])
+    return [resp.status_code]
+
+
+def scenario_overview_stats(client, rng, data):
+    college_id = rng.randint(1, data["colleges"])
+    return [client.get(url, query_string=params, headers=data["admin_headers"]).status_code for url, params in (
+        ("/university_admin/api/stats/category", {}),
+        ("/university_admin/api/stats/year", {}),
+        ("/university_admin/api/stats/college-clicks", {}),
+        ("/college_admin/api/stats/dashboard", {"college_id": college_id}),
+    )]
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "search": scenario_search,
+    "paper_click": scenario_paper_click,
+    "admin_papers": scenario_admin_papers,
+    "admin_users": scenario_admin_users,
+    "overview_stats": scenario_overview_stats,
+}
+
+
+# ======================
+# 执行与统计
+# ======================
+
+def percentile(sorted_values, p):
+    """最近秩百分位"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p * len(sorted_values)) - 1)]
+
+
+def run_scenario(app, name, data, args):
+    fn = SCENARIOS[name]
+    warm = app.test_client()
+    warm_rng = random.Random(f"{args.seed}-{name}-warmup")
+    for _ in range(args.warmup):
+        fn(warm, warm_rng, data)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads + 1)
+
+    def worker(n):
+        client = app.test_client()
+        rng = random.Random(f"{args.seed}-{name}-{n}")
+        local, failed = [], []
+        barrier.wait()
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            statuses = fn(client, rng, data)
+            local.append(time.perf_counter() - started)
+            failed.extend(s for s in statuses if s >= 400)
+        with lock:
+            latencies.extend(local)
+            errors.extend(failed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """返回 [(场景, 描述)] 形式的退化列表，同时打印对比表"""
+    regressions = []
+    print(f"\n{'场景':<16}{'rps':>10}{'基线':>10}{'p95(ms)':>10}{'基线':>10}")
+    for name, current in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<16}{current['rps']:>10}{'-':>10}{current['p95_ms']:>10}{'-':>10}")
+            continue
+        print(f"{name:<16}{current['rps']:>10}{base['rps']:>10}{current['p95_ms']:>10}{base['p95_ms']:>10}")
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append((name, f"p95 {base['p95_ms']}ms -> {current['p95_ms']}ms"))
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append((name, f"rps {base['rps']} -> {current['rps']}"))
+        if current["errors"] > base.get("errors", 0):
+            regressions.append((name, f"errors {base.get('errors', 0)} -> {current['errors']}"))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"未知场景: {', '.join(unknown)}（可选: {', '.join(SCENARIOS)}）")
+
+    with tempfile.TemporaryDirectory(prefix="bench_http_") as tmp:
+        db_uri = args.db_uri or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = build_app(db_uri)
+        from user.models import db
+        with app.app_context():
+            started = time.perf_counter()
+            data = seed(db, args)
+            print(f"数据准备完成: {args.users} 学生, {args.papers} 论文, {args.clicks} 点击, "
+                  f"用时 {time.perf_counter() - started:.1f}s")
+
+        results = {}
+        for name in names:
+            results[name] = run_scenario(app, name, data, args)
+            print(f"{name:<16}{results[name]}")
+
+        with app.app_context():
+            db.engine.dispose()
+
+    report = {
+        "meta": {
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "db": "sqlite(temp)" if args.db_uri is None else db_uri.split("://", 1)[0],
+            "seed": args.seed, "users": args.users, "papers": args.papers, "clicks": args.clicks,
+            "threads": args.threads, "requests": args.requests,
+        },
+        "scenarios": results,
+    }
+    print(json.dumps(report, ensure_ascii=False))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n⚠ 性能退化:")
+            for name, detail in regressions:
+                print(f"  {name}: {detail}")
+            sys.exit(1)
+        print("\n✅ 与基线相比无明显退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# benchmarks/bench_import.py
+"""
+论文导入基准：同一份数据分别用三种方式导入空库，比较耗时并校验结果一致
+    row   最初导入脚本的逐条路径：逐条查重、插入并提交，关键词逐个查询 / 插入（见 import_row_by_row）
+    batch 批量 executemany（默认 --batch-size 1000）
+    bulk  TSV 暂存 + LOAD DATA LOCAL INFILE + INSERT ... SELECT（--bulk）
+
+需要一个已执行过 create.sql 和 triggers.sql 的 MySQL 库，且服务端开启 local_infile；
+每种方式运行前会清空 papers / keywords / paper_keywords / categories。
+
+用法：
+    python benchmarks/bench_import.py --database paper_bench --records 100000
+    python benchmarks/bench_import.py --json papers.json --modes batch,bulk
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'sql_script'))
+
+import mysql.connector
+
+import db_init
+
+MODES = {
+    "row": None,
+    "batch": dict(batch_size=1000),
+    "bulk": dict(bulk=True),
+}
+
+WORDS = ("learning neural network graph model data robot vision language transformer attention "
+         "optimization reinforcement policy dataset benchmark adversarial diffusion generative "
+         "retrieval embedding contrastive federated privacy quantum causal inference").split()
+CATEGORIES = ('cs.AI', 'cs.LG', 'cs.CV', 'cs.CL', 'cs.RO', 'cs.IR', 'cs.CR', 'stat.ML')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="papers 导入方式基准")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--database", default="paper_bench", help="基准库（会被清空）")
+    parser.add_argument("--json", default=None, help="使用已有数据文件；不指定则生成合成数据")
+    parser.add_argument("--records", type=int, default=50000, help="合成数据条数")
+    parser.add_argument("--modes", default="row,batch,bulk", help="逗号分隔：" + ",".join(MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    # 在生成数据之前检查，避免白等数据生成后才因未知模式失败
+    args.modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in args.modes if m not in MODES]
+    if unknown or not args.modes:
+        parser.error(f"未知的导入模式: {', '.join(unknown) or '（空）'}（可选: {', '.join(MODES)}）")
+    return args
+
+
+def write_synthetic(path, count, seed):
+    """生成 NDJSON 合成论文数据，约 1% 的记录 arxiv_id 重复"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            n = i if rng.random() > 0.01 or i == 0 else rng.randrange(i)
+            words = rng.choices(WORDS, k=rng.randint(40, 120))
+            f.write(json.dumps({
+                "arxiv_id": f"bench.{n:08d}",
+                "title": " ".join(rng.choices(WORDS, k=8)).title(),
+                "summary": " ".join(words) + ".",
+                "link": f"https://arxiv.org/pdf/bench.{n:08d}",
+                "category": rng.choice(CATEGORIES),
+                "doi": f"10.48550/bench.{n:08d}" if n % 3 == 0 else ""
+            }) + "\n")
+
+
+def connect(args, **options):
+    return mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                   database=args.database, autocommit=False, **options)
+
+
+def reset(args):
+    conn = connect(args)
+    cur = conn.cursor()
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ('paper_keywords', 'papers', 'keywords', 'categories'):
+        cur.execute(f"TRUNCATE TABLE {table}")
+    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    conn.close()
+
+
+def snapshot(args):
+    """导入结果摘要：各表行数 + total_count 与实际关联数不一致的关键词数"""
+    conn = connect(args)
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM papers")
+    papers = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*), COALESCE(SUM(total_count), 0) FROM keywords")
+    keywords, total_count = cur.fetchone()
+    cur.execute("SELECT COUNT(*) FROM paper_keywords")
+    links = cur.fetchone()[0]
+    cur.execute("""
+        SELECT COUNT(*) FROM keywords k
+        WHERE k.total_count <> (SELECT COUNT(*) FROM paper_keywords pk WHERE pk.keyword_id = k.keyword_id)
+    """)
+    count_mismatch = cur.fetchone()[0]
+    cur.execute("""
+        SELECT COALESCE(SUM(CRC32(CONCAT(p.arxiv_id, ':', k.word))), 0)
+        FROM paper_keywords pk JOIN papers p USING (paper_id) JOIN keywords k USING (keyword_id)
+    """)
+    link_checksum = int(cur.fetchone()[0])
+    conn.close()
+    return {"papers": papers, "keywords": keywords, "paper_keywords": links,
+            "sum_total_count": int(total_count), "count_mismatch": count_mismatch,
+            "link_checksum": link_checksum}
+
+
+def import_row_by_row(args, json_path):
+    """
+    最初 db_init.process_json 的导入循环（保留原有的逐条 SELECT 查重、每条提交、关键词逐个查询 / 插入），
+    作为加速比的基准；只把读文件换成 iter_json_records，以便读取 NDJSON 合成数据
+    """
+    conn = connect(args)
+    cur = conn.cursor()
+    for _, _, rec in db_init.iter_json_records(json_path):
+        try:
+            title = rec.get('title', '').strip()
+            arxiv_id = rec.get('arxiv_id', '').strip()
+            doi = rec.get('doi', '').strip() or None
+            pdf_url = rec.get('link', '').strip()
+            abstract = rec.get('summary', rec.get('abstract', '')).strip()
+            category_code = rec.get('category', 'cs.GEN').strip() or 'cs.GEN'
+            if not (title and arxiv_id and pdf_url):
+                continue
+
+            cur.execute("SELECT paper_id FROM papers WHERE arxiv_id = %s", (arxiv_id,))
+            if cur.fetchone():
+                continue
+            category_id = db_init.get_or_create_category_id(cur, category_code)
+            cur.execute("""
+                INSERT INTO papers (title, arxiv_id, doi, category_id, abstract, pdf_url)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (title, arxiv_id, doi, category_id, abstract, pdf_url))
+            conn.commit()
+            paper_id = cur.lastrowid
+
+            for word in (db_init.extract_top_keywords(abstract, top_n=5) if abstract else []):
+                cur.execute("SELECT keyword_id FROM keywords WHERE word = %s", (word,))
+                row = cur.fetchone()
+                if row:
+                    kw_id = row[0]
+                else:
+                    cur.execute("INSERT INTO keywords (word) VALUES (%s)", (word,))
+                    kw_id = cur.lastrowid
+                    conn.commit()
+                cur.execute("INSERT IGNORE INTO paper_keywords (paper_id, keyword_id) VALUES (%s, %s)",
+                            (paper_id, kw_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+    cur.close()
+    conn.close()
+
+
+def main():
+    args = parse_args()
+    db_init.get_connection = lambda **options: connect(args, **options)
+
+    with tempfile.TemporaryDirectory(prefix='bench_import_') as tmp:
+        json_path = args.json
+        if json_path is None:
+            json_path = os.path.join(tmp, 'papers.ndjson')
+            write_synthetic(json_path, args.records, args.seed)
+            print(f"合成数据: {args.records} 条 -> {json_path}")
+
+        results = {}
+        for mode in args.modes:
+            reset(args)
+            started = time.perf_counter()
+            if MODES[mode] is None:
+                import_row_by_row(args, json_path)
+            else:
+                db_init.process_json(json_path, stream=True, progress_every=0,
+                                     checkpoint_path=os.path.join(tmp, f'{mode}.checkpoint.json'), **MODES[mode])
+            elapsed = time.perf_counter() - started
+            results[mode] = dict(seconds=round(elapsed, 2), **snapshot(args))
+            print(f"{mode:6s}: {results[mode]}")
+
+    base = results.get("row") or next(iter(results.values()))
+    for mode, result in results.items():
+        print(f"{mode:6s}: {result['seconds']:8.2f}s  加速比 {base['seconds'] / max(result['seconds'], 1e-9):6.1f}x")
+        if {k: v for k, v in result.items() if k != 'seconds'} != {k: v for k, v in base.items() if k != 'seconds'}:
+            print(f"⚠ {mode} 导入结果与基准方式不一致")
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
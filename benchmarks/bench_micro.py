@@ -0,0 +1,223 @@
+# benchmarks/bench_micro.py
+"""
+模型序列化与仓储热点函数的微基准（内存 SQLite）
+
+每个数据规模（默认 1k / 10k / 100k 行：论文、用户、点击各 N 行）分别测：
+    serialize_paper / serialize_user / serialize_click   查询全部行并逐行 to_dict（含关系懒加载）
+    search_papers_by_params                              标题关键词搜索
+    college_admin.get_papers / university_admin.get_papers   第 1 页
+    college_admin.get_click_stats_by_college / university_admin.get_click_stats_by_college
+    get_all_users                                        第 1 页 + to_dict
+每项多轮计时（--rounds，总时长超过 --max-time 秒后提前停止），记录 min / median / mean / stddev 和每轮 SQL 条数，
+报告结构与 pytest-benchmark 的 JSON 相近，可用 --baseline 按中位数对比。
+
+用法：
+    python benchmarks/bench_micro.py --output micro.json
+    python benchmarks/bench_micro.py --sizes 1000,10000 --baseline micro.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+VOCAB = (
+    "learning deep neural network graph model attention transformer language vision robust "
+    "optimization stochastic gradient federated privacy quantum reinforcement policy generative "
+    "diffusion retrieval embedding contrastive sparse efficient inference benchmark dataset"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="模型序列化 / 仓储函数微基准")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="逗号分隔的数据规模（每张表的行数）")
+    parser.add_argument("--rounds", type=int, default=5, help="每项最多计时轮数")
+    parser.add_argument("--max-time", type=float, default=10.0, help="单项累计计时超过该秒数后不再追加轮次")
+    parser.add_argument("--only", default=None, help="只运行名称包含该子串的基准")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="报告 JSON 写入该文件")
+    parser.add_argument("--baseline", default=None, help="与该报告对比中位数")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="中位数变慢超过该比例视为退化")
+    return parser.parse_args()
+
+
+def build_app():
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = "sqlite://"
+    # 基准进程内自行签发和校验令牌，未配置密钥时用固定值
+    Config.AUTH_TOKEN_SECRET = Config.AUTH_TOKEN_SECRET or "benchmark-secret"
+    from app import create_app
+    return create_app()
+
+
+def seed(db, rows, rng):
+    """论文 / 用户 / 点击各 rows 行，10 个学院、20 个分类"""
+    from user.models import College, User, Category, Paper, PaperClick, Role
+
+    db.drop_all()
+    db.create_all()
+    db.session.execute(College.__table__.insert(), [
+        {"college_id": i, "college_name": f"学院{i}", "code": f"C{i}"} for i in range(1, 11)
+    ])
+    db.session.execute(Category.__table__.insert(), [
+        {"category_id": i, "code": f"cs.B{i}", "name": f"Bench {i}"} for i in range(1, 21)
+    ])
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {"user_id": i, "username": f"bench_{i}", "password_hash": "123456", "real_name": f"学生{i}",
+         "role": Role.STUDENT, "college_id": i % 10 + 1, "created_at": now - timedelta(minutes=i)}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(Paper.__table__.insert(), [
+        {"paper_id": i, "title": " ".join(rng.sample(VOCAB, 6)).capitalize(), "arxiv_id": f"bench.{i:07d}",
+         "category_id": rng.randint(1, 20), "abstract": " ".join(rng.choices(VOCAB, k=40)),
+         "pdf_url": f"https://arxiv.org/pdf/bench.{i:07d}", "created_at": now - timedelta(days=rng.randint(0, 1500))}
+        for i in range(1, rows + 1)
+    ])
+    clicks = []
+    for i in range(1, rows + 1):
+        user_id = rng.randint(1, rows)
+        clicks.append({"click_id": i, "user_id": user_id, "paper_id": rng.randint(1, rows),
+                       "college_id": user_id % 10 + 1,
+                       "click_time": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))})
+    db.session.execute(PaperClick.__table__.insert(), clicks)
+    db.session.commit()
+
+
+def benchmarks():
+    """名称 -> 无参可调用对象"""
+    from user.models import Paper, User, PaperClick
+    from user.repositories import search_papers_by_params
+    from college_admin import repositories as college_repo
+    from university_admin import repositories as university_repo
+
+    def get_all_users():
+        result = university_repo.get_all_users(page=1, per_page=20)
+        return [user.to_dict() for user in result["users"]]
+
+    return {
+        "serialize_paper": lambda: [p.to_dict() for p in Paper.query.all()],
+        "serialize_user": lambda: [u.to_dict() for u in User.query.all()],
+        "serialize_click": lambda: [c.to_dict() for c in PaperClick.query.all()],
+        "search_papers_by_params": lambda: search_papers_by_params({"title": "graph"}),
+        "college_admin.get_papers": lambda: college_repo.get_papers(page=1, per_page=20),
+        "university_admin.get_papers": lambda: university_repo.get_papers(page=1, per_page=20),
+        "college_admin.get_click_stats_by_college": lambda: college_repo.get_click_stats_by_college(1),
+        "university_admin.get_click_stats_by_college": lambda: university_repo.get_click_stats_by_college(1),
+        "get_all_users": get_all_users,
+    }
+
+
+def measure(db, fn, rounds, max_time):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _count)
+    timings = []
+    try:
+        while len(timings) < rounds and sum(timings) < max_time:
+            # 清空身份映射，保证每轮都真实触发关系加载
+            db.session.expunge_all()
+            statements.clear()
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _count)
+    return {
+        "rounds": len(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "ops": 1 / statistics.fmean(timings),
+        "sql_per_round": len(statements),
+    }
+
+
+def compare(report, baseline, tolerance):
+    base = {(b["name"], b["params"]["rows"]): b["stats"] for b in baseline.get("benchmarks", [])}
+    regressions = []
+    print(f"\n{'基准':<46}{'行数':>8}{'中位数(ms)':>12}{'基线':>12}{'比值':>8}")
+    for bench in report["benchmarks"]:
+        key = (bench["name"], bench["params"]["rows"])
+        current = bench["stats"]["median"]
+        if key not in base:
+            print(f"{key[0]:<46}{key[1]:>8}{current * 1000:>12.2f}{'-':>12}{'-':>8}")
+            continue
+        ratio = current / base[key]["median"] if base[key]["median"] else float("inf")
+        print(f"{key[0]:<46}{key[1]:>8}{current * 1000:>12.2f}{base[key]['median'] * 1000:>12.2f}{ratio:>8.2f}")
+        if ratio > 1 + tolerance:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    app = build_app()
+
+    from user.models import db
+
+    results = []
+    with app.app_context():
+        for rows in sizes:
+            started = time.perf_counter()
+            seed(db, rows, random.Random(args.seed))
+            print(f"== {rows} 行（数据准备 {time.perf_counter() - started:.1f}s）")
+            for name, fn in benchmarks().items():
+                if args.only and args.only not in name:
+                    continue
+                stats = measure(db, fn, args.rounds, args.max_time)
+                results.append({"name": name, "group": name.split(".")[-1], "params": {"rows": rows}, "stats": stats})
+                print(f"  {name:<46} median {stats['median'] * 1000:10.2f}ms  "
+                      f"min {stats['min'] * 1000:10.2f}ms  SQL {stats['sql_per_round']:6d}  轮数 {stats['rounds']}")
+
+    report = {
+        "machine_info": {"python": platform.python_version(), "platform": platform.platform(),
+                         "processor": platform.processor()},
+        "commit_info": {"id": git_revision()},
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+        "benchmarks": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入 {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n⚠ 性能退化:")
+            for (name, rows), ratio in regressions:
+                print(f"  {name} @ {rows} 行: {ratio:.2f}x")
+            sys.exit(1)
+        print("\n✅ 与基线相比无明显退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,34 +4,28 @@ from user.models import db, User, Role, College
 # user.models和student.models中模型冲突，优先选择
 from user.models import PaperClick, Paper, Category
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from sqlalchemy import func, distinct, and_, or_
 import logging
 from functools import wraps
 from flask import request, jsonify, current_app
 import json
 
+from common.paper_stats import paper_histogram, get_paper_category_stats, get_paper_year_stats
+from common.keyword_stats import keyword_cloud
+from common.reference_data import reference_data
+from common.soft_delete import soft_delete
+from common.click_analytics import click_snapshot
+from common.db_routing import read_only
+from common.auth_token import current_identity, revoke_user
+
 logger = logging.getLogger(__name__)
 
 # ========== 新增：从请求头获取用户信息的函数 ==========
 def get_user_from_request():
-    """从请求头获取用户信息"""
+    """从请求头获取用户信息（校验签名令牌，不查数据库）"""
     try:
-        # 从请求头获取用户信息
-        user_info_str = request.headers.get('X-User-Info')
-        if not user_info_str:
-            return None
-        
-        # 解析用户信息
-        user_info = json.loads(user_info_str)
-        
-        # 从数据库获取用户
-        user = User.query.filter_by(
-            user_id=user_info.get('user_id'),
-            role=user_info.get('role')
-        ).first()
-        
-        return user
+        return current_identity()
     except Exception as e:
         logger.error(f"从请求头获取用户信息失败: {e}")
         return None
@@ -80,6 +74,7 @@ def require_college_admin(f):
     return decorated_function
 
 # ========== 修改原有函数，移除对current_user的直接依赖 ==========
+@read_only
 def get_students_by_college(college_id, page=1, per_page=20, search=''):
     """获取某学院的所有学生用户（支持分页和搜索）"""
     try:
@@ -147,7 +142,7 @@ def create_student(username, real_name, password, college_id):
     """创建新学生"""
     try:
         # 检查用户名是否已存在
-        existing_user = User.query.filter_by(username=username).first()
+        existing_user = User.query.execution_options(include_deleted=True).filter_by(username=username).first()
         if existing_user:
             return None, "用户名已存在"
         
@@ -182,6 +177,8 @@ def update_student(student_id, real_name=None, password=None, college_id=None):
             student.set_password(password)
         
         db.session.commit()
+        if password is not None:
+            revoke_user(student_id)
         return True, None
     except Exception as e:
         logger.error(f"更新学生信息失败: {e}")
@@ -197,6 +194,7 @@ def reset_password_for_students(user_id, current_user):
     
     student.set_password("123456")  # 重置为默认密码
     db.session.commit()
+    revoke_user(user_id)
     return True, None
 
 def delete_student_user(user_id, current_user):
@@ -206,12 +204,10 @@ def delete_student_user(user_id, current_user):
         if not student:
             return False, "学生不存在或无权限"
         
-        # 删除学生的浏览记录
-        PaperClick.query.filter_by(user_id=user_id).delete()
-        
-        # 删除学生用户
-        db.session.delete(student)
-        db.session.commit()
+        # 软删除：浏览记录和用户本身由后台任务分块清理
+        soft_delete(student)
+        revoke_user(user_id)
+        click_snapshot.drop_rows("user_id", [user_id])
         return True, None
     except Exception as e:
         logger.error(f"删除学生用户失败: {e}")
@@ -219,6 +215,7 @@ def delete_student_user(user_id, current_user):
         return False, f"删除学生用户失败: {str(e)}"
 
 # 修改论文管理函数
+@read_only
 def get_papers(page=1, per_page=20, search='', category_id=None):
     """获取论文列表（支持分页、搜索、筛选）"""
     try:
@@ -245,7 +242,7 @@ def get_papers(page=1, per_page=20, search='', category_id=None):
             func.date(Paper.created_at) == today
         ).count()
         
-        category_count = Category.query.count()
+        category_count = len(reference_data.categories())
         
         today_clicks = PaperClick.query.filter(
             func.date(PaperClick.click_time) == today
@@ -291,13 +288,13 @@ def create_paper(title, arxiv_id, category_id, pdf_url, doi=None, abstract=None)
     """创建新论文"""
     try:
         # 检查arXiv ID是否已存在
-        existing_paper = Paper.query.filter_by(arxiv_id=arxiv_id).first()
+        # 已软删除但尚未清理的论文仍占用 arXiv ID
+        existing_paper = Paper.query.execution_options(include_deleted=True).filter_by(arxiv_id=arxiv_id).first()
         if existing_paper:
             return None, "arXiv ID已存在"
         
         # 检查分类是否存在
-        category = Category.query.get(category_id)
-        if not category:
+        if reference_data.category(category_id) is None:
             return None, "分类不存在"
         
         # 创建新论文
@@ -312,6 +309,7 @@ def create_paper(title, arxiv_id, category_id, pdf_url, doi=None, abstract=None)
         
         db.session.add(new_paper)
         db.session.commit()
+        paper_histogram.on_paper_created(new_paper.category_id, new_paper.created_at)
         return new_paper, None
     except Exception as e:
         logger.error(f"创建论文失败: {e}")
@@ -327,16 +325,17 @@ def update_paper(paper_id, **kwargs):
         
         # 检查arXiv ID是否重复
         if 'arxiv_id' in kwargs and kwargs['arxiv_id'] != paper.arxiv_id:
-            existing_paper = Paper.query.filter_by(arxiv_id=kwargs['arxiv_id']).first()
+            existing_paper = Paper.query.execution_options(include_deleted=True).filter_by(arxiv_id=kwargs['arxiv_id']).first()
             if existing_paper and existing_paper.paper_id != paper_id:
                 return False, "arXiv ID已存在"
         
         # 检查分类是否存在
         if 'category_id' in kwargs:
-            category = Category.query.get(kwargs['category_id'])
-            if not category:
+            if reference_data.category(kwargs['category_id']) is None:
                 return False, "分类不存在"
         
+        old_category_id, old_created_at = paper.category_id, paper.created_at
+
         # 更新字段
         for key, value in kwargs.items():
             if hasattr(paper, key) and value is not None:
@@ -344,6 +343,11 @@ def update_paper(paper_id, **kwargs):
         
         paper.updated_at = datetime.utcnow()
         db.session.commit()
+        paper_histogram.on_paper_updated(old_category_id, old_created_at, paper.category_id, paper.created_at)
+        if paper.category_id != old_category_id:
+            click_snapshot.reassign("paper_id", paper_id, "category_id", paper.category_id)
+            # 分类榜按 papers.category_id 聚合，keywords 指纹不会因换分类而变化
+            keyword_cloud.invalidate()
         return True, None
     except Exception as e:
         logger.error(f"更新论文失败: {e}")
@@ -357,12 +361,13 @@ def delete_paper(paper_id):
         if not paper:
             return False
         
-        # 删除相关的浏览记录
-        PaperClick.query.filter_by(paper_id=paper_id).delete()
-        
-        # 删除论文
-        db.session.delete(paper)
-        db.session.commit()
+        category_id, created_at = paper.category_id, paper.created_at
+
+        # 软删除：浏览记录和论文本身由后台任务分块清理
+        soft_delete(paper)
+        paper_histogram.on_paper_deleted(category_id, created_at)
+        keyword_cloud.invalidate()
+        click_snapshot.drop_rows("paper_id", [paper_id])
         return True
     except Exception as e:
         logger.error(f"删除论文失败: {e}")
@@ -370,68 +375,95 @@ def delete_paper(paper_id):
         return False
 
 def get_all_categories():
-    """获取所有分类"""
-    return Category.query.all()
+    """获取所有分类（参考数据缓存中的字典列表）"""
+    return reference_data.categories()
+
+def _day_range(day):
+    """返回 [当天 00:00, 次日 00:00) 区间，范围比较可以直接命中时间列索引"""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
 
+@read_only
 def get_dashboard_stats(college_id):
-    """获取仪表板统计数据"""
-    today = date.today()
-    
+    """获取仪表板统计数据（标量子查询合并为一次查询，按 paper_clicks.college_id 过滤）"""
+    day_start, day_end = _day_range(date.today())
+
     # 学院学生总数
-    total_students = User.query.filter_by(
-        role=Role.STUDENT,
-        college_id=college_id
-    ).count()
-    
+    total_students = db.session.query(func.count(User.user_id)).filter(
+        User.college_id == college_id,
+        User.role == Role.STUDENT
+    ).scalar_subquery()
+
+    # 本学院学生产生的点击（走 idx_college_time，不再回传学生ID列表）
+    # 关联 users / papers，使已软删除、尚未清理完的用户和论文的点击不计入
+    college_clicks = db.session.query(PaperClick.click_id).join(
+        User, PaperClick.user_id == User.user_id
+    ).join(
+        Paper, PaperClick.paper_id == Paper.paper_id
+    ).filter(
+        PaperClick.college_id == college_id,
+        User.role == Role.STUDENT
+    )
+
     # 今日活跃学生数
-    student_ids = [u.user_id for u in User.query.filter_by(
-        role=Role.STUDENT,
-        college_id=college_id
-    ).all()]
-    
-    active_today = 0
-    if student_ids:
-        active_today = db.session.query(distinct(PaperClick.user_id)).filter(
-            PaperClick.user_id.in_(student_ids),
-            func.date(PaperClick.click_time) == today
-        ).count()
-    
+    active_today = college_clicks.filter(
+        PaperClick.click_time >= day_start,
+        PaperClick.click_time < day_end
+    ).with_entities(func.count(distinct(PaperClick.user_id))).scalar_subquery()
+
     # 学院总浏览数
-    total_clicks = 0
-    if student_ids:
-        total_clicks = PaperClick.query.filter(PaperClick.user_id.in_(student_ids)).count()
-    
+    total_clicks = college_clicks.with_entities(
+        func.count(PaperClick.click_id)
+    ).scalar_subquery()
+
     # 论文总数
-    total_papers = Paper.query.count()
-    
+    total_papers = db.session.query(func.count(Paper.paper_id)).scalar_subquery()
+
     # 今日新增论文
-    today_papers = Paper.query.filter(
-        func.date(Paper.created_at) == today
-    ).count()
-    
+    today_papers = db.session.query(func.count(Paper.paper_id)).filter(
+        Paper.created_at >= day_start,
+        Paper.created_at < day_end
+    ).scalar_subquery()
+
     # 分类数量
-    category_count = Category.query.count()
-    
-    # 今日浏览数
-    today_clicks = PaperClick.query.filter(
-        func.date(PaperClick.click_time) == today
-    ).count()
-    
+    category_count = db.session.query(func.count(Category.category_id)).scalar_subquery()
+
+    # 今日浏览数（同样排除已软删除用户 / 论文的点击）
+    today_clicks = db.session.query(func.count(PaperClick.click_id)).join(
+        User, PaperClick.user_id == User.user_id
+    ).join(
+        Paper, PaperClick.paper_id == Paper.paper_id
+    ).filter(
+        PaperClick.click_time >= day_start,
+        PaperClick.click_time < day_end
+    ).scalar_subquery()
+
+    row = db.session.query(
+        total_students.label('total_students'),
+        active_today.label('active_today'),
+        total_clicks.label('total_clicks'),
+        total_papers.label('total_papers'),
+        today_papers.label('today_papers'),
+        category_count.label('category_count'),
+        today_clicks.label('today_clicks')
+    ).one()
+
     return {
         "student_stats": {
-            "total_students": total_students,
-            "active_today": active_today,
-            "total_clicks": total_clicks
+            "total_students": row.total_students or 0,
+            "active_today": row.active_today or 0,
+            "total_clicks": row.total_clicks or 0
         },
         "paper_stats": {
-            "total_papers": total_papers,
-            "today_papers": today_papers,
-            "category_count": category_count,
-            "today_clicks": today_clicks
+            "total_papers": row.total_papers or 0,
+            "today_papers": row.today_papers or 0,
+            "category_count": row.category_count or 0,
+            "today_clicks": row.today_clicks or 0
         }
     }
 
 # 原有的其他函数保持不变
+@read_only
 def get_student_click_history(user_id):
     """获取学生的论文浏览记录"""
     return PaperClick.query.filter_by(user_id=user_id).order_by(PaperClick.click_time.desc()).all()
@@ -442,38 +474,11 @@ def delete_click_record(click_id, user_id):
     if click:
         db.session.delete(click)
         db.session.commit()
+        click_snapshot.drop_rows("click_id", [click_id])
         return True
     return False
 
-def get_paper_category_stats():
-    """获取论文分类统计数据（适配前端图表格式）"""
-    result = db.session.query(
-        Category.name,
-        func.count(Paper.paper_id).label('count')
-    ).join(Paper, Category.category_id == Paper.category_id
-           ).group_by(Category.category_id).all()
-
-    categories = [item.name for item in result]
-    counts = [item.count for item in result]
-    return {
-        "categories": categories,
-        "counts": counts
-    }
-
-def get_paper_year_stats():
-    """获取论文年份分布统计（适配MySQL）"""
-    result = db.session.query(
-        func.YEAR(Paper.created_at).label('year'),
-        func.count(Paper.paper_id).label('count')
-    ).group_by('year').order_by('year').all()
-
-    years = [int(item.year) for item in result]
-    counts = [item.count for item in result]
-    return {
-        "years": years,
-        "counts": counts
-    }
-
+@read_only
 def get_click_stats_by_college(college_id):
     """
     获取某学院学生的论文点击次数排行
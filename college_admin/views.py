@@ -19,8 +19,11 @@ from .repositories import (
     update_paper,
     delete_paper,
     get_all_categories,
-    get_dashboard_stats
+    get_dashboard_stats,
+    require_college_admin
 )
+from common.reference_data import reference_data, conditional_response
+from common.soft_delete import purge_jobs, job_id_for
 import json
 
 app = Flask(__name__)
@@ -298,10 +301,11 @@ def update_student_info(user_id):
         }), 500
 
 @blueprint.route("/api/reset_password/<int:user_id>", methods=["PUT"])
-def reset_student_password(user_id):
-    """重置学生密码"""
+@require_college_admin
+def reset_student_password(current_user, user_id):
+    """重置学生密码（只能操作本学院学生）"""
     try:
-        success, error = reset_password_for_students(user_id)
+        success, error = reset_password_for_students(user_id, current_user)
         if error:
             return jsonify({
                 "code": 400,
@@ -325,10 +329,11 @@ def reset_student_password(user_id):
         }), 500
 
 @blueprint.route("/api/delete_student/<int:user_id>", methods=["DELETE"])
-def delete_student(user_id):
-    """删除学生用户"""
+@require_college_admin
+def delete_student(current_user, user_id):
+    """删除学生用户（只能操作本学院学生）"""
     try:
-        success, error = delete_student_user(user_id)
+        success, error = delete_student_user(user_id, current_user)
         if error:
             return jsonify({
                 "code": 400,
@@ -336,9 +341,11 @@ def delete_student(user_id):
             }), 400
             
         if success:
+            job = purge_jobs.get(job_id_for("user", user_id))
             return jsonify({
                 "code": 200,
-                "message": "学生用户删除成功"
+                "message": "学生用户删除成功",
+                "data": {"purge_job": job.to_dict() if job else None}
             }), 200
         return jsonify({
             "code": 404,
@@ -351,6 +358,22 @@ def delete_student(user_id):
             "message": f"删除学生用户失败: {str(e)}"
         }), 500
 
+@blueprint.route("/api/purge-jobs/<job_id>", methods=["GET"])
+@require_college_admin
+def get_purge_job(current_user, job_id):
+    """获取删除清理任务的进度（学生删除任务只能查看本学院的）"""
+    job = purge_jobs.get(job_id)
+    if job is None or (job.kind == "user" and job.college_id != current_user.college_id):
+        return jsonify({
+            "code": 404,
+            "message": "清理任务不存在或已过期"
+        }), 404
+    return jsonify({
+        "code": 200,
+        "message": "获取清理任务成功",
+        "data": job.to_dict()
+    }), 200
+
 # 论文管理相关API
 @blueprint.route("/api/papers", methods=["GET"])
 def get_papers_list():
@@ -484,9 +507,11 @@ def delete_paper_by_id(paper_id):
         
         success = delete_paper(paper_id)
         if success:
+            job = purge_jobs.get(job_id_for("paper", paper_id))
             return jsonify({
                 "code": 200,
-                "message": "论文删除成功"
+                "message": "论文删除成功",
+                "data": {"purge_job": job.to_dict() if job else None}
             }), 200
         return jsonify({
             "code": 500,
@@ -506,11 +531,12 @@ def get_categories_list():
     """获取所有分类"""
     try:
         categories = get_all_categories()
-        return jsonify({
+        response = jsonify({
             "code": 200,
             "message": "获取分类成功",
-            "data": [category.to_dict() for category in categories]
-        }), 200
+            "data": categories
+        })
+        return conditional_response(response, reference_data.snapshot().category_etag)
         
     except Exception as e:
         current_app.logger.error(f"获取分类失败: {e}")
@@ -524,8 +550,14 @@ def get_categories_list():
 def get_dashboard_statistics():
     """获取仪表板统计数据"""
     try:
-        # 移除学院ID关联，如需按学院查询可通过参数传入
-        stats = get_dashboard_stats()
+        college_id = request.args.get('college_id', type=int)
+        if not college_id:
+            return jsonify({
+                "code": 400,
+                "message": "缺少学院ID参数（college_id）"
+            }), 400
+
+        stats = get_dashboard_stats(college_id)
         return jsonify({
             "code": 200,
             "message": "获取统计数据成功",
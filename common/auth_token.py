@@ -0,0 +1,238 @@
+# common/auth_token.py
+"""
+HMAC 签名的身份令牌
+
+- 登录时签发：载荷为 user_id / role / college_id / 签发时间（毫秒），HMAC-SHA256 截断到 128 位，
+  格式 v1.<base64url 载荷>.<base64url 签名>，约 60 字节；
+- 校验只做签名比对和过期判断，不查数据库；
+- 用户被删除、角色 / 学院变更、密码被修改时调用 revoke_user，之前签发的令牌全部失效。
+  吊销表是按 LRU 淘汰的有界字典，只需保留 AUTH_TOKEN_TTL 内的记录（更早的令牌本身已过期）；
+  超出容量被挤掉的记录会抬高全局 not_before，宁可让更早的令牌集体失效，也不会让被吊销的令牌复活。
+视图通过 current_identity() / require_identity 取当前用户，不再信任请求参数里的 user_id。
+吊销表在进程内存中，多进程部署时每个进程各自维护（令牌 TTL 决定了最长的不一致窗口）。
+签名密钥取 AUTH_TOKEN_SECRET，为空时用 SECRET_KEY；两者都未配置时非调试模式启动即报错，
+否则各进程 / 每次重启的密钥不同，令牌会间歇性校验失败。
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import json
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, has_app_context, jsonify, request
+
+from user.models import Role
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 'v1'
+SIGNATURE_BYTES = 16
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_REVOKED_CACHE_SIZE = 10000
+
+_fallback_secret = None
+
+
+class TokenIdentity:
+    """令牌中携带的身份信息，字段与 User 同名，可直接传给按 User 编写的仓储函数"""
+
+    __slots__ = ('user_id', 'role', 'college_id', 'issued_at')
+    is_authenticated = True
+
+    def __init__(self, user_id, role, college_id, issued_at):
+        self.user_id = user_id
+        self.role = role
+        self.college_id = college_id
+        self.issued_at = issued_at
+
+    def __repr__(self):
+        return f"<TokenIdentity(user_id={self.user_id}, role={self.role.value}, college_id={self.college_id})>"
+
+
+class RevokedUsers:
+    """被吊销用户的 LRU：user_id -> 吊销时间（毫秒）"""
+
+    def __init__(self, capacity=DEFAULT_REVOKED_CACHE_SIZE):
+        self.capacity = capacity
+        self.not_before = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id, ttl):
+        now = _now_ms()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = now
+            # 按吊销时间有序，队首最旧；超过 TTL 的记录对应的令牌已过期，可直接丢弃
+            horizon = now - ttl * 1000
+            while self._entries:
+                _, oldest_at = next(iter(self._entries.items()))
+                if oldest_at >= horizon and len(self._entries) <= self.capacity:
+                    break
+                self._entries.popitem(last=False)
+                if oldest_at >= horizon:
+                    self.not_before = max(self.not_before, oldest_at)
+
+    def is_revoked(self, user_id, issued_at):
+        if issued_at <= self.not_before:
+            return True
+        revoked_at = self._entries.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.not_before = 0
+
+
+revoked_users = RevokedUsers()
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _configured_secret(config):
+    secret = config.get('AUTH_TOKEN_SECRET', '') or config.get('SECRET_KEY', '')
+    # 'none' 是旧版 config.py 的占位默认值
+    if not secret or secret == 'none':
+        return None
+    return secret.encode() if isinstance(secret, str) else secret
+
+
+def _secret():
+    global _fallback_secret
+    secret = _configured_secret(current_app.config) if has_app_context() else None
+    if secret is not None:
+        return secret
+    if _fallback_secret is None:
+        # 仅调试模式 / 应用外脚本会走到这里：进程内随机密钥，重启后令牌失效，但不会被伪造
+        logger.warning("未配置 AUTH_TOKEN_SECRET / SECRET_KEY，身份令牌使用临时随机密钥")
+        _fallback_secret = os.urandom(32)
+    return _fallback_secret
+
+
+def init_auth_token(app):
+    """启动时检查签名密钥：非调试模式下未配置则直接报错"""
+    if _configured_secret(app.config) is not None or app.debug:
+        return
+    raise RuntimeError("未配置 AUTH_TOKEN_SECRET 或 SECRET_KEY：多进程 / 重启后身份令牌将无法校验。"
+                       "请在环境变量中设置（本地调试可设置 FLASK_DEBUG=1 使用临时密钥）")
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(_secret(), payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def issue_token(user):
+    """为 User（或 TokenIdentity）签发令牌"""
+    payload = f"{user.user_id}|{user.role.value}|{user.college_id}|{_now_ms()}".encode()
+    return f"{TOKEN_VERSION}.{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token):
+    """校验令牌，成功返回 TokenIdentity，签名错误 / 过期 / 已吊销返回 None"""
+    try:
+        version, payload_part, signature_part = token.split('.')
+        if version != TOKEN_VERSION:
+            return None
+        payload = _b64decode(payload_part)
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature_part)):
+            return None
+        user_id, role, college_id, issued_at = payload.decode().split('|')
+        identity = TokenIdentity(int(user_id), Role(role), int(college_id), int(issued_at))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+    if _now_ms() - identity.issued_at > _config('AUTH_TOKEN_TTL', DEFAULT_TTL) * 1000:
+        return None
+    if revoked_users.is_revoked(identity.user_id, identity.issued_at):
+        return None
+    return identity
+
+
+def revoke_user(user_id):
+    """使该用户此前签发的令牌全部失效（删除、改角色 / 学院、改密码后调用）"""
+    revoked_users.capacity = _config('AUTH_REVOKED_CACHE_SIZE', DEFAULT_REVOKED_CACHE_SIZE)
+    revoked_users.revoke(user_id, _config('AUTH_TOKEN_TTL', DEFAULT_TTL))
+
+
+def token_from_headers(headers):
+    """从 Authorization: Bearer <token> 取令牌"""
+    authorization = headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[7:].strip()
+    return None
+
+
+def _identity_from_request():
+    # 优先 Authorization: Bearer <token>，其次 X-User-Info 中登录时返回的 token 字段
+    token = token_from_headers(request.headers)
+    if not token:
+        user_info_str = request.headers.get('X-User-Info')
+        if not user_info_str:
+            return None
+        try:
+            token = json.loads(user_info_str).get('token')
+        except (ValueError, AttributeError):
+            return None
+    if not token or not isinstance(token, str):
+        return None
+    return verify_token(token)
+
+
+def current_identity():
+    """当前请求的 TokenIdentity（只校验签名，不查数据库），未登录或令牌无效返回 None"""
+    return _identity_from_request()
+
+
+def _identity_error(identity, roles):
+    if identity is None:
+        return jsonify({
+            "code": 401,
+            "message": "用户未登录"
+        }), 401
+    if roles and identity.role not in roles:
+        return jsonify({
+            "code": 403,
+            "message": "权限不足"
+        }), 403
+    return None
+
+
+def identity_error(roles=()):
+    """未登录返回 401、角色不在 roles 中返回 403 的响应，校验通过返回 None"""
+    return _identity_error(current_identity(), roles)
+
+
+def require_identity(*roles):
+    """要求登录（可限定角色）的装饰器，身份作为第一个参数传给视图函数"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            identity = current_identity()
+            error = _identity_error(identity, roles)
+            if error is not None:
+                return error
+            return f(identity, *args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,259 @@
+# common/click_analytics.py
+"""
+paper_clicks 的进程内列式快照，用于概览页的即席统计
+
+每条点击存成一行 NumPy 列：
+    click_id(int64) user_id/paper_id/college_id/category_id(int32) click_time(int64, UTC 纪元秒)
+其中 college_id 取点击记录上的学院（与 SQL 统计一致），category_id 取论文当前分类。
+
+- 增量：按 max(click_id) 向后追加，间隔 CLICK_SNAPSHOT_REFRESH_INTERVAL 秒懒刷新；
+- 只载入未软删除的用户 / 论文的点击（与 SQL 统计一致），后台清理完成前这些点击也不会回到快照；
+- 应用内的删除 / 改分类通过 drop_rows、reassign 直接修改列；college_id 取自点击记录本身，用户改学院不影响已有点击；
+- 每 CLICK_SNAPSHOT_REBUILD_INTERVAL 秒全量重建一次，兜底绕过应用的写入。
+快照在首次使用时同步全量载入，进程启动后第一个统计请求需要等待载入完成（千万级点击约数秒到数十秒）。
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import func, cast, literal_column, Integer
+
+from user.models import db, PaperClick, Paper, User
+from common.timeseries import GRANULARITY_SECONDS, WEEK_ORIGIN, format_edges
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "click_id": np.int64,
+    "user_id": np.int32,
+    "paper_id": np.int32,
+    "college_id": np.int32,
+    "category_id": np.int32,
+    "click_time": np.int64,
+}
+
+# 可用于分组 / 过滤的维度
+DIMENSIONS = ("user_id", "paper_id", "college_id", "category_id")
+
+FETCH_CHUNK = 200000
+
+
+def click_epoch_column():
+    """click_time 转纪元秒（按 UTC 解释，不受会话时区影响）"""
+    if db.engine.dialect.name == 'sqlite':
+        return cast(func.strftime('%s', PaperClick.click_time), Integer)
+    return func.timestampdiff(literal_column('SECOND'), '1970-01-01 00:00:00', PaperClick.click_time)
+
+
+def _empty_columns():
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+class ClickSnapshot:
+    """paper_clicks 的列式快照"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._columns = _empty_columns()
+        self._max_click_id = 0
+        self._refreshed_at = None
+        self._rebuilt_at = None
+
+    # ---------- 配置 ----------
+    def _config(self, key, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    # ---------- 载入 ----------
+    def _fetch_after(self, click_id):
+        """取 click_id 之后的全部点击，分块拉取后拼成列"""
+        chunks = []
+        last_id = click_id
+        while True:
+            rows = db.session.query(
+                PaperClick.click_id,
+                PaperClick.user_id,
+                PaperClick.paper_id,
+                PaperClick.college_id,
+                Paper.category_id,
+                click_epoch_column()
+            ).join(Paper, Paper.paper_id == PaperClick.paper_id
+                   ).join(User, User.user_id == PaperClick.user_id
+                          ).filter(PaperClick.click_id > last_id,
+                                   Paper.deleted_at.is_(None),
+                                   User.deleted_at.is_(None)
+                                   ).order_by(PaperClick.click_id
+                                              ).limit(FETCH_CHUNK).all()
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64))
+            last_id = int(chunks[-1][-1, 0])
+            if len(rows) < FETCH_CHUNK:
+                break
+
+        if not chunks:
+            return _empty_columns()
+        data = np.concatenate(chunks)
+        return {
+            name: np.ascontiguousarray(data[:, i], dtype=dtype)
+            for i, (name, dtype) in enumerate(COLUMNS.items())
+        }
+
+    def rebuild(self):
+        """全量重建"""
+        started = time.perf_counter()
+        columns = self._fetch_after(0)
+        now = time.monotonic()
+        with self._lock:
+            self._columns = columns
+            self._max_click_id = int(columns["click_id"].max()) if len(columns["click_id"]) else 0
+            self._refreshed_at = now
+            self._rebuilt_at = now
+        logger.info(f"点击快照重建完成: {len(columns['click_id'])} 行, 用时 {time.perf_counter() - started:.2f}s")
+
+    def append_new(self):
+        """按 max(click_id) 增量追加"""
+        with self._lock:
+            since = self._max_click_id
+        fresh = self._fetch_after(since)
+        with self._lock:
+            if len(fresh["click_id"]):
+                # 重建与追加并发时只保留真正的新行
+                keep = fresh["click_id"] > self._max_click_id
+                self._columns = {
+                    name: np.concatenate([self._columns[name], fresh[name][keep]])
+                    for name in COLUMNS
+                }
+                self._max_click_id = int(self._columns["click_id"].max())
+            self._refreshed_at = time.monotonic()
+
+    def _pending_work(self):
+        """返回 'rebuild' / 'append' / None"""
+        now = time.monotonic()
+        rebuild_interval = self._config('CLICK_SNAPSHOT_REBUILD_INTERVAL', 3600)
+        refresh_interval = self._config('CLICK_SNAPSHOT_REFRESH_INTERVAL', 30)
+        if self._rebuilt_at is None or (rebuild_interval > 0 and now - self._rebuilt_at > rebuild_interval):
+            return 'rebuild'
+        if now - self._refreshed_at > refresh_interval:
+            return 'append'
+        return None
+
+    def ensure_fresh(self):
+        if self._pending_work() is None:
+            return
+
+        # 已有快照时，别的线程正在刷新就直接用旧数据
+        if not self._refresh_lock.acquire(blocking=self._rebuilt_at is None):
+            return
+        try:
+            work = self._pending_work()
+            if work == 'rebuild':
+                self.rebuild()
+            elif work == 'append':
+                self.append_new()
+        finally:
+            self._refresh_lock.release()
+
+    def columns(self):
+        """返回当前列的只读视图（整体替换，读者无需加锁）"""
+        self.ensure_fresh()
+        return self._columns
+
+    # ---------- 应用内写入同步 ----------
+    def drop_rows(self, column, values):
+        """删除 column 取值在 values 中的行（删用户/删论文/删浏览记录）"""
+        if self._rebuilt_at is None:
+            return
+        with self._lock:
+            keep = ~np.isin(self._columns[column], np.asarray(values))
+            self._columns = {name: col[keep] for name, col in self._columns.items()}
+
+    def reassign(self, key_column, key, column, value):
+        """改写某个维度（论文改分类）"""
+        if self._rebuilt_at is None:
+            return
+        with self._lock:
+            updated = self._columns[column].copy()
+            updated[self._columns[key_column] == key] = value
+            self._columns = {**self._columns, column: updated}
+
+    # ---------- 查询 ----------
+    def _mask(self, columns, filters, start, end):
+        mask = np.ones(len(columns["click_id"]), dtype=bool)
+        for name, value in (filters or {}).items():
+            if name not in DIMENSIONS:
+                raise ValueError(f"不支持的过滤维度: {name}")
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(columns[name], np.asarray(list(value)))
+            else:
+                mask &= columns[name] == value
+        if start is not None:
+            mask &= columns["click_time"] >= start
+        if end is not None:
+            mask &= columns["click_time"] < end
+        return mask
+
+    def aggregate(self, group_by=("college_id",), filters=None, start=None, end=None, top=None):
+        """
+        分组计数：group_by 取 DIMENSIONS 或 hour/day/week 中的若干项
+        filters: {维度: 值或值列表}；start/end: 纪元秒，左闭右开
+        返回按点击数降序的 [{维度...: 值, "clicks": n}]，top 为 None 时全部返回
+        """
+        group_by = tuple(group_by)
+        columns = self.columns()
+        mask = self._mask(columns, filters, start, end)
+
+        keys = []
+        for name in group_by:
+            if name in DIMENSIONS:
+                keys.append(columns[name][mask].astype(np.int64))
+            elif name in GRANULARITY_SECONDS:
+                step = GRANULARITY_SECONDS[name]
+                origin = WEEK_ORIGIN if name == "week" else 0
+                times = columns["click_time"][mask]
+                keys.append(origin + (times - origin) // step * step)
+            else:
+                raise ValueError(f"不支持的分组维度: {name}")
+
+        if not group_by:
+            return [{"clicks": int(mask.sum())}]
+
+        if not len(keys[0]):
+            return []
+        # 稀疏分组：对各维度键做按列去重，组数不超过行数，不按各维度基数之积分配数组
+        groups, counts = np.unique(np.stack(keys), axis=1, return_counts=True)
+
+        order = np.argsort(-counts, kind="stable")
+        if top is not None and top < len(order):
+            order = order[:top]
+
+        result = []
+        for idx in order:
+            item = {}
+            for dim, name in enumerate(group_by):
+                value = groups[dim, idx]
+                if name in GRANULARITY_SECONDS:
+                    item[name] = format_edges(np.array([value]))[0]
+                else:
+                    item[name] = int(value)
+            item["clicks"] = int(counts[idx])
+            result.append(item)
+        return result
+
+    def timestamps(self, filters=None, start=None, end=None):
+        """满足条件的点击时间（纪元秒，不保证有序）"""
+        columns = self.columns()
+        return columns["click_time"][self._mask(columns, filters, start, end)]
+
+
+click_snapshot = ClickSnapshot()
+
+
+def snapshot_enabled():
+    if has_app_context():
+        return current_app.config.get('CLICK_SNAPSHOT_ENABLED', True)
+    return True
@@ -0,0 +1,153 @@
+# common/db_pool.py
+"""
+数据库连接池配置与监控
+
+- engine_options(uri, options)：按数据库类型整理 Config.SQLALCHEMY_ENGINE_OPTIONS，
+  内存 SQLite 使用 StaticPool，不接受 pool_size 等参数，这里去掉；
+- PoolMonitor：包装 engine.pool.connect 统计取连接等待时间，
+  通过 checkout / checkin 事件统计在用连接数及峰值、新建连接和失效连接数。
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# 只对 QueuePool 有意义的参数
+QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+# 取连接等待时间直方图上界（毫秒）
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def engine_options(uri, options):
+    """返回适用于该数据库 URI 的 create_engine 参数"""
+    options = dict(options or {})
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+    return options
+
+
+class PoolMonitor:
+    """单个 engine 的连接池指标（进程内累计）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.connects = 0
+            self.invalidations = 0
+
+    def attach(self, engine):
+        """挂到 engine 上；重复调用只生效一次"""
+        if self.engine is engine:
+            return
+        self.engine = engine
+        self._wrap_pool(engine.pool)
+        event.listen(engine.pool, 'checkout', self._on_checkout)
+        event.listen(engine.pool, 'checkin', self._on_checkin)
+        event.listen(engine.pool, 'connect', self._on_connect)
+        event.listen(engine.pool, 'invalidate', self._on_invalidate)
+        # dispose() 会重建连接池：事件监听随之复制，connect 包装需要重新挂上
+        event.listen(engine, 'engine_disposed', lambda e: self._wrap_pool(e.pool))
+
+    def _wrap_pool(self, pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                self._record_wait(time.perf_counter() - started)
+
+        pool.connect = timed_connect
+
+    def _record_wait(self, seconds):
+        index = bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[index] += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_conn, record):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_connect(self, dbapi_conn, record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def wait_percentile(self, q):
+        """由直方图估算等待时间分位数（毫秒，返回所在桶的上界，落在最后一个桶时返回最大值）"""
+        with self._lock:
+            total = sum(self.wait_buckets)
+            buckets = list(self.wait_buckets)
+            wait_max_ms = round(self.wait_max * 1000, 3)
+        if not total:
+            return 0.0
+        target = q * total
+        seen = 0
+        for bound, count in zip(WAIT_BUCKETS_MS, buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return wait_max_ms
+
+    def snapshot(self):
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram_ms": {
+                    (f"le_{bound}" if bound != float('inf') else "le_inf"): count
+                    for bound, count in zip(WAIT_BUCKETS_MS + (float('inf'),), self.wait_buckets)
+                },
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+        if pool is not None:
+            data["pool_class"] = type(pool).__name__
+            data["status"] = pool.status()
+            if isinstance(pool, QueuePool):
+                data["pool_size"] = pool.size()
+                data["checked_out"] = pool.checkedout()
+                data["overflow"] = pool.overflow()
+        return data
+
+
+pool_monitor = PoolMonitor()
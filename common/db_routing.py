@@ -0,0 +1,155 @@
+# common/db_routing.py
+"""
+读写分离：只读仓储函数走从库，其余一律走主库
+
+- @read_only 标记的函数执行期间，RoutingSession.get_bind 返回从库 engine（SQLALCHEMY_BINDS['replica']）；
+- 写语句、flush，以及本会话已经写过之后的所有查询都回到主库（同一请求内读己之写）；
+- 发生过写操作的客户端在 REPLICA_STICKY_SECONDS 秒内通过 cookie 继续读主库，规避复制延迟；
+- 从库连接出错时标记为不可用 REPLICA_RETRY_SECONDS 秒，本次调用在主库上重新执行。
+未配置 DB_REPLICA_URI 时所有查询都走主库，行为与原来一致。
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_KEY = 'replica'
+STICKY_COOKIE = 'db_primary_until'
+
+_read_only = contextvars.ContextVar('db_read_only', default=False)
+# 当前 @read_only 调用的从库出错标记（每次调用一个），由 handle_error 钩子设置
+_replica_failure = contextvars.ContextVar('db_replica_failure', default=None)
+
+
+class ReplicaHealth:
+    """从库故障熔断：出错后一段时间内不再路由到从库"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.down_until = 0.0
+        self.failures = 0
+
+    def available(self):
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, retry_seconds):
+        with self._lock:
+            self.failures += 1
+            self.down_until = time.monotonic() + retry_seconds
+
+
+replica_health = ReplicaHealth()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _sticky_to_primary():
+    if not has_request_context():
+        return False
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class RoutingSession(Session):
+    """在 Flask-SQLAlchemy 的 bind_key 路由之上增加从库路由"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not _read_only.get() or self._flushing or self.info.get('wrote'):
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        return replica_health.available() and not _sticky_to_primary()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_wrote_on_flush(session, flush_context):
+    _mark_wrote(session)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_wrote_on_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_wrote(orm_execute_state.session)
+
+
+def _mark_wrote(session):
+    session.info['wrote'] = True
+    if has_request_context():
+        g.db_wrote = True
+
+
+def read_only(func):
+    """标记只读仓储函数：优先在从库执行，从库出错则在主库重试一次"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _read_only.get() or not replica_health.available():
+            return func(*args, **kwargs)
+        failure = {"failed": False}
+        token = _read_only.set(True)
+        failure_token = _replica_failure.set(failure)
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            if not failure["failed"]:
+                raise
+            result = None
+        finally:
+            _replica_failure.reset(failure_token)
+            _read_only.reset(token)
+        if failure["failed"]:
+            # 从库在本次调用中出错（函数内部可能已吞掉异常），回主库重新执行
+            logger.warning(f"从库查询失败，{func.__name__} 改在主库执行")
+            from user.models import db
+            db.session.rollback()
+            return func(*args, **kwargs)
+        return result
+    return wrapper
+
+
+def _on_replica_error(context):
+    """从库连不上 / 断线 / 库表不可用（OperationalError）时熔断；pre-ping 失败会自动重连，不算"""
+    if context.is_pre_ping:
+        return
+    if context.is_disconnect or isinstance(context.original_exception, context.dialect.loaded_dbapi.OperationalError):
+        replica_health.mark_down(_config('REPLICA_RETRY_SECONDS', 30))
+        # 只标记出错语句所属的那次调用，其他线程的调用不受影响
+        failure = _replica_failure.get()
+        if failure is not None:
+            failure["failed"] = True
+
+
+def init_replica_routing(app, db):
+    """在 db.init_app 之后调用：为从库 engine 挂错误监听，并在写请求后下发粘主库 cookie"""
+    with app.app_context():
+        engine = db.engines.get(REPLICA_BIND_KEY)
+    if engine is None:
+        return
+    event.listen(engine, 'handle_error', _on_replica_error)
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        sticky = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if sticky and g.get('db_wrote'):
+            response.set_cookie(STICKY_COOKIE, f"{time.time() + sticky:.3f}", max_age=int(sticky) + 1,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,107 @@
+# common/keyword_stats.py
+"""
+词云关键词 top-k 缓存
+
+- 全局榜直接读 keywords.total_count（由 triggers.sql 维护）；
+- 分类榜按 paper_keywords JOIN papers 聚合，首次请求该分类时计算；
+- 每个榜只保留前 MAX_TOP 个词，请求的 top 在内存里切片；
+- 每隔 KEYWORD_STATS_CHECK_INTERVAL 秒用一条轻量查询取 keywords 表指纹，
+  paper_keywords 有增删（触发器会改 total_count）时指纹变化，整体失效。
+"""
+import logging
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import func
+
+from user.models import db, Keyword, PaperKeyword, Paper
+from common.db_routing import read_only
+
+logger = logging.getLogger(__name__)
+
+MAX_TOP = 500
+DEFAULT_CHECK_INTERVAL = 60
+
+
+class KeywordCloud:
+    """按分类缓存的关键词排行"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rankings = {}
+        self._fingerprint = None
+        self._checked_at = None
+
+    def _check_interval(self):
+        if has_app_context():
+            return current_app.config.get('KEYWORD_STATS_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+        return DEFAULT_CHECK_INTERVAL
+
+    def _current_fingerprint(self):
+        row = db.session.query(
+            func.count(Keyword.keyword_id),
+            func.max(Keyword.keyword_id),
+            func.sum(Keyword.total_count)
+        ).one()
+        return tuple(int(value or 0) for value in row)
+
+    def _refresh_if_changed(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self._check_interval():
+            return
+        fingerprint = self._current_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._rankings = {}
+                self._fingerprint = fingerprint
+            self._checked_at = now
+
+    def invalidate(self):
+        """应用内删除论文等操作后调用，下次请求重新计算"""
+        with self._lock:
+            self._rankings = {}
+            self._checked_at = None
+
+    def _compute(self, category_id):
+        if category_id is None:
+            rows = db.session.query(
+                Keyword.word,
+                Keyword.total_count
+            ).filter(Keyword.total_count > 0
+                     ).order_by(Keyword.total_count.desc(), Keyword.word
+                                ).limit(MAX_TOP).all()
+        else:
+            count_col = func.count(PaperKeyword.paper_id)
+            rows = db.session.query(
+                Keyword.word,
+                count_col
+            ).join(PaperKeyword, PaperKeyword.keyword_id == Keyword.keyword_id
+                   ).join(Paper, Paper.paper_id == PaperKeyword.paper_id
+                          ).filter(Paper.category_id == category_id
+                                   ).group_by(Keyword.keyword_id, Keyword.word
+                                              ).order_by(count_col.desc(), Keyword.word
+                                                         ).limit(MAX_TOP).all()
+        return [(row[0], int(row[1])) for row in rows]
+
+    def top_keywords(self, top=200, category_id=None):
+        self._refresh_if_changed()
+        ranking = self._rankings.get(category_id)
+        if ranking is None:
+            ranking = self._compute(category_id)
+            with self._lock:
+                self._rankings[category_id] = ranking
+        top = max(1, min(top, MAX_TOP))
+        return {
+            "keywords": [word for word, _ in ranking[:top]],
+            "counts": [count for _, count in ranking[:top]]
+        }
+
+
+keyword_cloud = KeywordCloud()
+
+
+@read_only
+def get_top_keywords(top=200, category_id=None):
+    """获取词云关键词 top-k（可按分类）"""
+    return keyword_cloud.top_keywords(top=top, category_id=category_id)
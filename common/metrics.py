@@ -0,0 +1,170 @@
+# common/metrics.py
+"""
+HTTP 请求指标：按路由的延迟直方图、状态码计数、进行中请求数，以 Prometheus 文本格式暴露在 /metrics
+
+- 路由按 URL 规则模板归并（/api/papers/<int:paper_id> 而不是具体 id），未匹配的请求记为 <unmatched>；
+- 计数分散在固定数量的分片中（按 threading.get_ident() 取模），每个分片一把锁，线程之间很少争用；
+  分片数量固定，线程频繁创建 / 退出时内存不增长，抓取时逐个分片加锁汇总；
+- 多进程部署（gunicorn 多 worker）时每个进程各自暴露，由 Prometheus 分别抓取后聚合。
+"""
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+# 秒，与 Prometheus 客户端默认桶一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = '<unmatched>'
+SHARD_COUNT = 16
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    """一个分片的计数，读写都在 lock 内"""
+
+    def __init__(self, n_buckets):
+        self.n_buckets = n_buckets
+        self.lock = threading.Lock()
+        # (method, route) -> [各桶计数..., 总次数, 总耗时]
+        self.histograms = {}
+        # (method, route, status) -> 次数
+        self.statuses = {}
+        # (method, route) -> 进行中的请求数
+        self.in_flight = {}
+
+    def merge(self, other):
+        for key, values in other.histograms.items():
+            mine = self.histograms.setdefault(key, [0] * (self.n_buckets + 2) + [0.0])
+            for i, value in enumerate(values):
+                mine[i] += value
+        for key, count in other.statuses.items():
+            self.statuses[key] = self.statuses.get(key, 0) + count
+        for key, count in other.in_flight.items():
+            self.in_flight[key] = self.in_flight.get(key, 0) + count
+
+
+class RequestMetrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, shard_count=SHARD_COUNT):
+        self.buckets = tuple(sorted(buckets))
+        self._shards = [_Shard(len(self.buckets)) for _ in range(shard_count)]
+
+    def _shard(self):
+        return self._shards[threading.get_ident() % len(self._shards)]
+
+    # ---------- 请求路径 ----------
+
+    def started(self, method, route):
+        shard = self._shard()
+        key = (method, route)
+        with shard.lock:
+            shard.in_flight[key] = shard.in_flight.get(key, 0) + 1
+
+    def finished(self, method, route, status, seconds):
+        shard = self._shard()
+        key = (method, route)
+        status_key = (method, route, status)
+        bucket = bisect.bisect_left(self.buckets, seconds)
+        with shard.lock:
+            shard.in_flight[key] = shard.in_flight.get(key, 0) - 1
+            shard.statuses[status_key] = shard.statuses.get(status_key, 0) + 1
+            values = shard.histograms.get(key)
+            if values is None:
+                values = shard.histograms[key] = [0] * (len(self.buckets) + 2) + [0.0]
+            values[bucket] += 1
+            values[-2] += 1
+            values[-1] += seconds
+
+    # ---------- 抓取 ----------
+
+    def collect(self):
+        """汇总所有分片，返回合并后的 _Shard"""
+        total = _Shard(len(self.buckets))
+        for shard in self._shards:
+            with shard.lock:
+                total.merge(shard)
+        return total
+
+    def render(self):
+        data = self.collect()
+        lines = [
+            '# HELP http_request_duration_seconds 请求处理耗时',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (method, route), values in sorted(data.histograms.items()):
+            labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            # +Inf 和 count 用各桶之和
+            cumulative += values[len(self.buckets)]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[-1]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+        lines += ['# HELP http_requests_total 按状态码统计的请求数', '# TYPE http_requests_total counter']
+        for (method, route, status), count in sorted(data.statuses.items()):
+            lines.append(f'http_requests_total{{method="{_escape(method)}",route="{_escape(route)}",'
+                         f'status="{status}"}} {count}')
+
+        lines += ['# HELP http_requests_in_flight 正在处理的请求数', '# TYPE http_requests_in_flight gauge']
+        for (method, route), count in sorted(data.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{method="{_escape(method)}",route="{_escape(route)}"}} {count}')
+
+        lines += _pool_lines()
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _pool_lines():
+    from common.db_pool import pool_monitor
+    stats = pool_monitor.snapshot()
+    return [
+        '# TYPE db_pool_in_use gauge', f'db_pool_in_use {stats["in_use"]}',
+        '# TYPE db_pool_checkouts_total counter', f'db_pool_checkouts_total {stats["checkouts"]}',
+        '# TYPE db_pool_timeouts_total counter', f'db_pool_timeouts_total {stats["timeouts"]}',
+    ]
+
+
+request_metrics = RequestMetrics()
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def init_metrics(app):
+    """注册请求钩子和 /metrics 路由；应在其他请求钩子之前调用，使计时覆盖它们"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_route = _route()
+        g.metrics_started = time.perf_counter()
+        request_metrics.started(request.method, g.metrics_route)
+
+    @app.after_request
+    def record_request_metrics(response):
+        # after_request 逆序执行，先注册的最后执行，计时包含其他钩子
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            request_metrics.finished(request.method, g.metrics_route, response.status_code,
+                                     time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def finish_failed_request_metrics(exc):
+        # 没走到 after_request（例如钩子自身抛错）时按 500 记账，保证进行中计数能回落
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            request_metrics.finished(request.method, g.metrics_route, 500, time.perf_counter() - started)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(request_metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,178 @@
+# common/paper_stats.py
+"""
+论文分类 / 年份分布的共享直方图服务
+
+三个蓝图的 /api/stats/category、/api/stats/year 都从这里取数：
+- 首次访问时各做一次 GROUP BY 载入内存；
+- 论文增、改（分类变化）、删时由 repositories 调用 on_paper_* 增量调整；
+- 超过 PAPER_STATS_TTL 秒后整体重载一次，兜底导入脚本等绕过 ORM 的写入；
+  重载查询期间到达的增量先记下来，换入新计数时重放，不会被整体替换丢掉。
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, has_app_context
+from sqlalchemy import func, extract
+
+from user.models import db, Paper, Category
+from common.reference_data import reference_data
+from common.db_routing import read_only
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600
+
+
+class PaperHistogram:
+    """进程内的论文分类 / 年份计数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._category_counts = Counter()
+        self._category_names = {}
+        self._year_counts = Counter()
+        self._loaded_at = None
+        # 进行中的每次重载各有一个列表，记录查询期间到达的增量
+        self._pending_deltas = []
+
+    # ---------- 载入 ----------
+    def _ttl(self):
+        if has_app_context():
+            return current_app.config.get('PAPER_STATS_TTL', DEFAULT_TTL)
+        return DEFAULT_TTL
+
+    def _expired(self):
+        if self._loaded_at is None:
+            return True
+        ttl = self._ttl()
+        return ttl > 0 and time.monotonic() - self._loaded_at > ttl
+
+    def reload(self):
+        """全量重算（两条 GROUP BY）"""
+        deltas = []
+        with self._lock:
+            self._pending_deltas.append(deltas)
+        try:
+            category_rows, year_rows = self._query()
+        except Exception:
+            self._stop_recording(deltas)
+            raise
+
+        category_counts = Counter({row[0]: row[2] for row in category_rows})
+        year_counts = Counter({int(row[0]): row[1] for row in year_rows})
+        with self._lock:
+            self._pending_deltas = [d for d in self._pending_deltas if d is not deltas]
+            for category_id, year, delta in deltas:
+                _apply(category_counts, category_id, delta)
+                _apply(year_counts, year, delta)
+            self._category_counts = category_counts
+            self._category_names = {row[0]: row[1] for row in category_rows}
+            self._year_counts = year_counts
+            self._loaded_at = time.monotonic()
+
+    def _stop_recording(self, deltas):
+        # 按身份移除：两个空列表相等，list.remove 可能删掉另一次重载的记录
+        with self._lock:
+            self._pending_deltas = [d for d in self._pending_deltas if d is not deltas]
+
+    def _query(self):
+        category_rows = db.session.query(
+            Category.category_id,
+            Category.name,
+            func.count(Paper.paper_id)
+        ).join(Paper, Category.category_id == Paper.category_id
+               ).group_by(Category.category_id, Category.name).all()
+
+        year_col = extract('year', Paper.created_at)
+        year_rows = db.session.query(
+            year_col,
+            func.count(Paper.paper_id)
+        ).filter(Paper.created_at.isnot(None)).group_by(year_col).all()
+        return category_rows, year_rows
+
+    def _ensure_loaded(self):
+        if self._expired():
+            self.reload()
+
+    def invalidate(self):
+        """下次读取时全量重载"""
+        with self._lock:
+            self._loaded_at = None
+
+    # ---------- 增量调整 ----------
+    def _adjust(self, category_id, year, delta):
+        with self._lock:
+            for deltas in self._pending_deltas:
+                deltas.append((category_id, year, delta))
+            if self._loaded_at is None:
+                return
+            _apply(self._category_counts, category_id, delta)
+            _apply(self._year_counts, year, delta)
+
+    def on_paper_created(self, category_id, created_at):
+        self._adjust(category_id, created_at.year if created_at else None, 1)
+
+    def on_paper_deleted(self, category_id, created_at):
+        self._adjust(category_id, created_at.year if created_at else None, -1)
+
+    def on_paper_updated(self, old_category_id, old_created_at, new_category_id, new_created_at):
+        if old_category_id == new_category_id and old_created_at == new_created_at:
+            return
+        self.on_paper_deleted(old_category_id, old_created_at)
+        self.on_paper_created(new_category_id, new_created_at)
+
+    # ---------- 读取 ----------
+    def _category_name(self, category_id):
+        with self._lock:
+            name = self._category_names.get(category_id)
+        if name is None:
+            # 参考数据可能要查库，不在锁内进行；查不到的不缓存，新分类入库后能取到名称
+            category = reference_data.category(category_id)
+            name = category["name"] if category else None
+            if name is not None:
+                with self._lock:
+                    self._category_names[category_id] = name
+        return name
+
+    def category_stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            items = sorted(self._category_counts.items())
+        return {
+            "categories": [self._category_name(cid) for cid, _ in items],
+            "counts": [count for _, count in items]
+        }
+
+    def year_stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            items = sorted(self._year_counts.items())
+        return {
+            "years": [year for year, _ in items],
+            "counts": [count for _, count in items]
+        }
+
+
+def _apply(counts, key, delta):
+    if key is None:
+        return
+    counts[key] += delta
+    if counts[key] <= 0:
+        del counts[key]
+
+
+paper_histogram = PaperHistogram()
+
+
+@read_only
+def get_paper_category_stats():
+    """获取论文分类统计数据（适配前端图表格式）"""
+    return paper_histogram.category_stats()
+
+
+@read_only
+def get_paper_year_stats():
+    """获取论文年份分布统计"""
+    return paper_histogram.year_stats()
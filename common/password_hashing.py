@@ -0,0 +1,126 @@
+# common/password_hashing.py
+"""
+密码哈希：werkzeug scrypt / pbkdf2，计算放在独立的进程池里
+
+- 一次 scrypt（默认 N=32768, r=8）约 100ms CPU，在请求线程里算会占住 GIL，拖慢同进程的其他接口；
+  放到进程池后请求线程只是等待 future，其他请求照常处理；
+- 进程池大小 PASSWORD_HASH_WORKERS，同时排队 + 计算的任务数不超过 PASSWORD_HASH_MAX_PENDING，
+  等待名额超过 PASSWORD_HASH_WAIT_SECONDS 抛 PasswordHashBusy（登录接口返回 503），避免登录洪峰把请求线程全部占住；
+- 哈希算法与成本由 PASSWORD_HASH_METHOD 配置（如 scrypt:32768:8:1、pbkdf2:sha256:600000），
+  旧的明文行或成本参数与当前配置不同的行在登录成功后自动重新哈希；
+- PASSWORD_HASH_WORKERS=0 时在当前线程内计算（单元调试 / 单进程脚本）。
+"""
+import hmac
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class PasswordHashBusy(Exception):
+    """哈希进程池已满，等待超时"""
+
+
+def is_hashed(stored):
+    """werkzeug 格式为 method$salt$hash；其余视为旧的明文密码"""
+    return stored.startswith(HASH_PREFIXES) and stored.count('$') == 2
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored, password):
+    return check_password_hash(stored, password)
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self.wait_seconds = 5.0
+        self._slots = threading.BoundedSemaphore(1)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+
+    def configure(self, method, workers, max_pending, wait_seconds):
+        self.method = method or DEFAULT_METHOD
+        self.workers = max(0, workers)
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._dummy_hash = None
+        self.shutdown()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn：请求线程运行中 fork 可能复制到被持有的锁
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            raise PasswordHashBusy("密码哈希任务过多，请稍后重试")
+        try:
+            try:
+                return self._pool().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # 工作进程被杀（OOM 等）后重建一次
+                logger.warning("密码哈希进程池异常，重建后重试")
+                self.shutdown()
+                return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored, password):
+        if not stored:
+            return False
+        if not is_hashed(stored):
+            # 旧数据：明文比较（常量时间），登录成功后由调用方重新哈希
+            return hmac.compare_digest(stored.encode(), password.encode())
+        return self._run(_verify, stored, password)
+
+    def needs_rehash(self, stored):
+        """明文，或算法 / 成本参数与当前配置不一致"""
+        return not is_hashed(stored) or stored.split('$', 1)[0] != self.method
+
+    def burn(self, password):
+        """用户不存在时也做一次等价的校验，避免通过响应时间枚举用户名"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(os.urandom(16).hex())
+        self.verify(self._dummy_hash, password)
+
+
+password_hasher = PasswordHasher()
+
+
+def init_password_hashing(app):
+    config = app.config
+    password_hasher.configure(
+        method=config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=config.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)),
+        max_pending=config.get('PASSWORD_HASH_MAX_PENDING', 32),
+        wait_seconds=config.get('PASSWORD_HASH_WAIT_SECONDS', 5.0),
+    )
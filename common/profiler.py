@@ -0,0 +1,202 @@
+# common/profiler.py
+"""
+按需请求剖析：只对被选中的请求开启 profiler，其余请求没有额外开销
+
+- 触发方式：请求头 X-Profile 携带 PROFILE_TOKEN（管理员持有的密钥，未配置则不接受请求头触发），
+  或按 PROFILE_SAMPLE_EVERY 每 N 个请求抽样一个（0 表示关闭抽样）；
+- 输出格式：prof（cProfile，可用 snakeviz / pstats 查看）或 collapsed
+  （后台线程按 PROFILE_SAMPLE_INTERVAL_MS 采样调用栈，输出 flamegraph.pl / speedscope 可直接读取的折叠栈）；
+  请求头 X-Profile-Format 可覆盖默认格式 PROFILE_FORMAT；
+- 文件写入 PROFILE_DIR，最多保留 PROFILE_MAX_FILES 个，超出时删除最旧的；
+  被剖析的请求在响应头 X-Profile-File 中返回文件名。
+"""
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ('prof', 'collapsed')
+
+
+class StackSampler:
+    """在后台线程里定时抓取目标线程的调用栈，统计折叠栈出现次数"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def collapse(frame):
+    """调用栈 -> 'root;...;leaf'，每层为 函数名 (文件:首行)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if filename.startswith(PROJECT_ROOT):
+            filename = os.path.relpath(filename, PROJECT_ROOT)
+        else:
+            filename = os.path.basename(filename)
+        names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.token = ''
+        self.sample_every = 0
+        self.default_format = 'prof'
+        self.interval = 0.005
+        self.directory = 'logs/profiles'
+        self.max_files = 50
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def configure(self, token, sample_every, default_format, interval_ms, directory, max_files):
+        self.token = token or ''
+        self.sample_every = sample_every
+        self.default_format = default_format if default_format in FORMATS else 'prof'
+        self.interval = interval_ms / 1000.0
+        self.directory = directory
+        self.max_files = max_files
+
+    def wanted(self, headers):
+        """返回本次请求使用的格式，不剖析时返回 None"""
+        supplied = headers.get('X-Profile')
+        if supplied and self.token and hmac.compare_digest(supplied, self.token):
+            fmt = headers.get('X-Profile-Format', self.default_format)
+            return fmt if fmt in FORMATS else self.default_format
+        # itertools.count 的 next 在 CPython 下是原子的，不需要加锁
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return self.default_format
+        return None
+
+    def start(self, fmt):
+        if fmt == 'collapsed':
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            return sampler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, fmt, profiler, label):
+        if fmt == 'collapsed':
+            profiler.stop()
+        else:
+            profiler.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{label}.{'collapsed' if fmt == 'collapsed' else 'prof'}"
+        path = os.path.join(self.directory, name)
+        if fmt == 'collapsed':
+            profiler.dump(path)
+        else:
+            profiler.dump_stats(path)
+        self._prune()
+        return name
+
+    def _prune(self):
+        with self._lock:
+            try:
+                files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                         if name.endswith(('.prof', '.collapsed'))]
+                if len(files) <= self.max_files:
+                    return
+                files.sort(key=os.path.getmtime)
+                for path in files[:len(files) - self.max_files]:
+                    os.remove(path)
+            except OSError as e:
+                logger.warning(f"清理剖析文件失败: {e}")
+
+
+request_profiler = RequestProfiler()
+
+
+def _label():
+    rule = request.url_rule
+    route = rule.rule if rule is not None else request.path
+    slug = ''.join(c if c.isalnum() else '_' for c in route).strip('_')[:80] or 'root'
+    return f"{request.method}_{slug}"
+
+
+def init_profiler(app):
+    """注册请求钩子；未配置 PROFILE_TOKEN 且 PROFILE_SAMPLE_EVERY 为 0 时不做任何事"""
+    config = app.config
+    request_profiler.configure(
+        token=config.get('PROFILE_TOKEN', ''),
+        sample_every=config.get('PROFILE_SAMPLE_EVERY', 0),
+        default_format=config.get('PROFILE_FORMAT', 'prof'),
+        interval_ms=config.get('PROFILE_SAMPLE_INTERVAL_MS', 5),
+        directory=config.get('PROFILE_DIR', 'logs/profiles'),
+        max_files=config.get('PROFILE_MAX_FILES', 50),
+    )
+    if not request_profiler.token and not request_profiler.sample_every:
+        return
+
+    @app.before_request
+    def start_profile():
+        fmt = request_profiler.wanted(request.headers)
+        if fmt is None:
+            return
+        try:
+            g.profile = (fmt, request_profiler.start(fmt), time.perf_counter())
+        except ValueError as e:
+            # 同一线程上已有其他 profiler 在运行（例如开发时外部 cProfile）
+            logger.warning(f"无法开启请求剖析: {e}")
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        fmt, profiler, started = profile
+        try:
+            name = request_profiler.finish(fmt, profiler, _label())
+            response.headers['X-Profile-File'] = name
+            logger.info(f"已剖析 {request.method} {request.path}（{(time.perf_counter() - started) * 1000:.1f}ms）: {name}")
+        except Exception as e:
+            logger.warning(f"保存剖析结果失败: {e}")
+        return response
+
+    @app.teardown_request
+    def stop_profile_on_error(exc):
+        # 没走到 after_request 时关闭 profiler / 采样线程，不保存结果
+        profile = g.pop('profile', None)
+        if profile is not None:
+            fmt, profiler, _ = profile
+            if fmt == 'collapsed':
+                profiler.stop()
+            else:
+                profiler.disable()
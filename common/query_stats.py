@@ -0,0 +1,126 @@
+# common/query_stats.py
+"""
+按请求统计 SQL：条数、数据库耗时，以及同一语句形状的重复次数（N+1 检测）
+
+- 在 Engine 类上监听 before/after_cursor_execute，主库和从库都会统计；
+- 只在请求上下文内累计，结果挂在 g 上，请求结束时：
+  调试模式（或 DB_QUERY_HEADERS=true）下写入 X-DB-Queries / X-DB-Time 响应头；
+  同一形状的语句重复超过 DB_REPEAT_WARN_THRESHOLD 次时记 warning 日志；
+- add_query_observer 注册的回调会收到每条语句的耗时（供慢查询日志等复用计时）。
+"""
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# IN (?, ?, ?) / VALUES (...), (...) 这类随参数个数变化的部分折叠成一个，便于按形状归并
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SHAPE_CACHE_SIZE = 2048
+_shape_cache = {}
+
+_observers = []
+
+
+def statement_shape(statement):
+    """归一化语句：压缩空白、折叠占位符列表"""
+    shape = _shape_cache.get(statement)
+    if shape is None:
+        shape = _PLACEHOLDER_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+        if len(_shape_cache) >= _SHAPE_CACHE_SIZE:
+            _shape_cache.clear()
+        _shape_cache[statement] = shape
+    return shape
+
+
+def add_query_observer(callback):
+    """callback(statement, parameters, elapsed_seconds, context, executemany)"""
+    _observers.append(callback)
+
+
+class RequestQueryStats:
+    """单个请求内的 SQL 统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.seconds += elapsed
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold):
+        """返回重复次数超过阈值的 [(形状, 次数)]，按次数降序"""
+        merged = Counter()
+        for statement, count in self.shapes.items():
+            merged[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in merged.most_common() if count > threshold]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        stats = g.get("db_query_stats")
+        if stats is not None:
+            stats.record(statement, elapsed)
+    for callback in _observers:
+        try:
+            callback(statement, parameters, elapsed, context, executemany)
+        except Exception as e:
+            logger.warning(f"SQL 观察回调出错: {e}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_start_on_error(context):
+    # 执行失败不会触发 after_cursor_execute，丢掉对应的开始时间
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+def current_query_stats():
+    """当前请求的统计（不在请求中时返回 None）"""
+    return g.get("db_query_stats") if has_request_context() else None
+
+
+def init_query_stats(app):
+    """注册请求钩子"""
+
+    @app.before_request
+    def start_query_stats():
+        g.db_query_stats = RequestQueryStats()
+
+    @app.after_request
+    def finish_query_stats(response):
+        stats = g.get("db_query_stats")
+        if stats is None:
+            return response
+        if app.debug or app.config.get("DB_QUERY_HEADERS"):
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Time"] = f"{stats.seconds * 1000:.2f}ms"
+        threshold = app.config.get("DB_REPEAT_WARN_THRESHOLD", 10)
+        if threshold:
+            for shape, count in stats.repeated(threshold):
+                current_app.logger.warning(
+                    f"疑似 N+1 查询: {request.method} {request.path} 中同一语句执行 {count} 次"
+                    f"（共 {stats.count} 条 SQL，{stats.seconds * 1000:.1f}ms）: {shape[:300]}"
+                )
+        return response
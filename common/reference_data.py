@@ -0,0 +1,132 @@
+# common/reference_data.py
+"""
+学院 / 分类参考数据的进程内缓存
+
+- colleges、categories 两张小表整体载入内存，按 id 建字典，仓储里的存在性检查和 to_dict 中的关联都变成字典查找；
+- 每隔 REFERENCE_DATA_CHECK_INTERVAL 秒重新读取两张表（各一条 SELECT），内容有变化时版本号 +1；
+  查不到某个 id 时也会提前重读一次（每 MISS_RELOAD_INTERVAL 秒最多一次），导入脚本新加的分类能立刻生效；
+- 应用内修改了这两张表时调用 invalidate()；
+- 列表接口用内容摘要作为 ETag（多进程之间一致），客户端带 If-None-Match 时返回 304。
+快照是不可变对象，整体替换，读取不加锁。
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from flask import current_app, has_app_context, request
+
+from user.models import College, Category
+from common.db_routing import read_only
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 60
+MISS_RELOAD_INTERVAL = 5
+
+
+class _Snapshot:
+    """某一版本的参考数据"""
+
+    def __init__(self, version, colleges, categories):
+        self.version = version
+        self.colleges = {row["college_id"]: row for row in colleges}
+        self.categories = {row["category_id"]: row for row in categories}
+        self.college_list = colleges
+        self.category_list = categories
+        self.college_etag = _etag("colleges", colleges)
+        self.category_etag = _etag("categories", categories)
+
+
+def _etag(table, rows):
+    digest = hashlib.sha1(json.dumps(rows, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+    return f"{table}-{digest[:16]}"
+
+
+class ReferenceData:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = None
+        self._miss_reload_at = 0.0
+
+    def _check_interval(self):
+        if has_app_context():
+            return current_app.config.get('REFERENCE_DATA_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+        return DEFAULT_CHECK_INTERVAL
+
+    @read_only
+    def _read_tables(self):
+        colleges = [college.to_dict() for college in College.query.order_by(College.college_id).all()]
+        categories = [category.to_dict() for category in Category.query.order_by(Category.category_id).all()]
+        return colleges, categories
+
+    def reload(self):
+        """重新读取两张表，内容变化时版本号 +1"""
+        colleges, categories = self._read_tables()
+        with self._lock:
+            current = self._snapshot
+            if (current is None or current.college_list != colleges
+                    or current.category_list != categories):
+                version = current.version + 1 if current is not None else 1
+                self._snapshot = _Snapshot(version, colleges, categories)
+                if current is not None:
+                    logger.info(f"参考数据已更新到版本 {version}")
+            self._loaded_at = time.monotonic()
+        return self._snapshot
+
+    def invalidate(self):
+        """应用内增删改学院 / 分类后调用，下次读取时重载"""
+        with self._lock:
+            self._loaded_at = None
+
+    def snapshot(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self._check_interval():
+            return self.reload()
+        return self._snapshot
+
+    def _lookup(self, table, key):
+        # 请求参数里的 id 可能是字符串，与 Query.get 一样按整数主键查找
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+        row = getattr(self.snapshot(), table).get(key)
+        if row is None:
+            now = time.monotonic()
+            if now - self._miss_reload_at > MISS_RELOAD_INTERVAL:
+                self._miss_reload_at = now
+                row = getattr(self.reload(), table).get(key)
+        return row
+
+    # ---------- 查询 ----------
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def college(self, college_id):
+        """学院字典（与 College.to_dict 相同），不存在返回 None"""
+        return self._lookup('colleges', college_id)
+
+    def category(self, category_id):
+        """分类字典（与 Category.to_dict 相同），不存在返回 None"""
+        return self._lookup('categories', category_id)
+
+    def colleges(self):
+        return self.snapshot().college_list
+
+    def categories(self):
+        return self.snapshot().category_list
+
+
+reference_data = ReferenceData()
+
+
+def conditional_response(response, etag):
+    """给列表响应加 ETag；与 If-None-Match 匹配时改为 304"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
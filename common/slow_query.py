@@ -0,0 +1,255 @@
+# common/slow_query.py
+"""
+慢查询日志
+
+- 复用 query_stats 的计时，耗时超过 SLOW_QUERY_MS 的语句生成一条记录：
+  语句、参数形状（只记类型和个数，不记值）、耗时、调用它的仓储函数、所在请求；
+- 记录放入有界队列，由后台线程写入按大小轮转的 JSON Lines 日志（请求线程不做 IO）；
+- 按 SLOW_QUERY_EXPLAIN_SAMPLE 比例抽样 SELECT 语句，在后台线程另取连接执行 EXPLAIN 并附在记录上，
+  同一语句形状 EXPLAIN_INTERVAL 秒内只 EXPLAIN 一次；
+- 汇总：python -m common.slow_query summarize --log logs/slow_query.log
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+
+from common.query_stats import add_query_observer, statement_shape
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_PREFIXES = (os.path.join(PROJECT_ROOT, 'common', 'query_stats.py'),
+                  os.path.join(PROJECT_ROOT, 'common', 'slow_query.py'))
+
+EXPLAIN_INTERVAL = 600
+QUEUE_SIZE = 1000
+STATEMENT_MAX_CHARS = 4000
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold = 0.0
+        self.explain_sample = 0.0
+        self.records = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self._explained = {}
+        self._writer = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def configure(self, path, threshold_ms, explain_sample, max_bytes, backups):
+        self.threshold = threshold_ms / 1000.0
+        self.explain_sample = explain_sample
+        if not threshold_ms:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        writer = logging.getLogger('slow_query.records')
+        writer.setLevel(logging.INFO)
+        writer.propagate = False
+        for handler in list(writer.handlers):
+            writer.removeHandler(handler)
+            handler.close()
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        writer.addHandler(handler)
+        self._writer = writer
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._worker.start()
+
+    # ---------- 请求线程：只组装记录并入队 ----------
+
+    def observe(self, statement, parameters, elapsed, context, executemany):
+        if not self.threshold or elapsed < self.threshold:
+            return
+        if context is not None and not context.execution_options.get('slow_query_log', True):
+            return
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            "duration_ms": round(elapsed * 1000, 2),
+            "shape": statement_shape(statement)[:STATEMENT_MAX_CHARS],
+            "statement": statement[:STATEMENT_MAX_CHARS],
+            "params": params_shape(parameters, executemany),
+            "caller": find_caller(),
+            "endpoint": f"{request.method} {request.path}" if has_request_context() else None,
+            "database": context.root_connection.engine.url.database if context is not None else None,
+        }
+        engine = None
+        if (self.explain_sample and not executemany and context is not None
+                and statement.lstrip()[:6].upper() == 'SELECT' and random.random() < self.explain_sample):
+            engine = context.root_connection.engine
+        try:
+            self.records.put_nowait((record, engine, parameters))
+        except queue.Full:
+            self.dropped += 1
+
+    # ---------- 后台线程：EXPLAIN + 写日志 ----------
+
+    def _run(self):
+        while True:
+            record, engine, parameters = self.records.get()
+            try:
+                if engine is not None and self._should_explain(record["shape"]):
+                    record["explain"] = explain(engine, record["statement"], parameters)
+                if self.dropped:
+                    record["dropped_before"], self.dropped = self.dropped, 0
+                self._writer.info(json.dumps(record, ensure_ascii=False, default=str))
+            except Exception as e:
+                logger.warning(f"写慢查询日志失败: {e}")
+            finally:
+                self.records.task_done()
+
+    def _should_explain(self, shape):
+        now = time.monotonic()
+        last = self._explained.get(shape)
+        if last is not None and now - last < EXPLAIN_INTERVAL:
+            return False
+        if len(self._explained) > 10000:
+            self._explained.clear()
+        self._explained[shape] = now
+        return True
+
+    def flush(self, timeout=5.0):
+        """等待队列写完（测试 / 退出前使用）"""
+        deadline = time.monotonic() + timeout
+        while self.records.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def params_shape(parameters, executemany=False):
+    """参数只记录类型结构，避免把密码等敏感值写进日志"""
+    if executemany:
+        rows = list(parameters) if parameters is not None else []
+        return {"rows": len(rows), "row": params_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def find_caller():
+    """沿调用栈找到发起查询的业务代码，优先 repositories.py / common/ 中的函数"""
+    frame = sys._getframe(1)
+    first = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and not filename.startswith(_SKIP_PREFIXES):
+            location = (f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_code.co_name}:{frame.f_lineno}")
+            if filename.endswith('repositories.py') or os.sep + 'common' + os.sep in filename:
+                return location
+            first = first or location
+        frame = frame.f_back
+    return first
+
+
+def explain(engine, statement, parameters):
+    """在独立连接上执行 EXPLAIN，返回结果行（列名 -> 值）"""
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with engine.connect().execution_options(slow_query_log=False) as conn:
+        result = conn.exec_driver_sql(prefix + statement, parameters if parameters else ())
+        return [dict(row._mapping) for row in result]
+
+
+slow_query_log = SlowQueryLog()
+add_query_observer(slow_query_log.observe)
+
+
+def init_slow_query_log(app):
+    config = app.config
+    slow_query_log.configure(
+        path=config.get('SLOW_QUERY_LOG', 'logs/slow_query.log'),
+        threshold_ms=config.get('SLOW_QUERY_MS', 200),
+        explain_sample=config.get('SLOW_QUERY_EXPLAIN_SAMPLE', 0.1),
+        max_bytes=config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backups=config.get('SLOW_QUERY_LOG_BACKUPS', 5),
+    )
+
+
+# ======================
+# 汇总
+# ======================
+
+def read_records(path):
+    """按时间顺序读取日志及其轮转文件（path.N ... path.1, path）"""
+    rotated = [p for p in glob.glob(path + '.*') if p.rsplit('.', 1)[1].isdigit()]
+    rotated.sort(key=lambda p: int(p.rsplit('.', 1)[1]), reverse=True)
+    for file_path in rotated + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(records, sort='total', top=20):
+    """按 (调用函数, 语句形状) 分组统计次数、总耗时、平均、p95、最大"""
+    groups = defaultdict(list)
+    plans = {}
+    for record in records:
+        key = (record.get("caller"), record.get("shape"))
+        groups[key].append(record["duration_ms"])
+        if record.get("explain"):
+            plans[key] = record["explain"]
+
+    rows = []
+    for (caller, shape), durations in groups.items():
+        durations.sort()
+        rows.append({
+            "caller": caller,
+            "shape": shape,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 2),
+            "avg_ms": round(sum(durations) / len(durations), 2),
+            "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "max_ms": durations[-1],
+            "explain": plans.get((caller, shape)),
+        })
+    sort_key = {"total": "total_ms", "max": "max_ms", "count": "count", "avg": "avg_ms"}[sort]
+    rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="慢查询日志汇总")
+    sub = parser.add_subparsers(dest='command', required=True)
+    report = sub.add_parser('summarize', help="按调用函数和语句形状汇总")
+    report.add_argument('--log', default='logs/slow_query.log')
+    report.add_argument('--sort', choices=['total', 'max', 'count', 'avg'], default='total')
+    report.add_argument('--top', type=int, default=20)
+    report.add_argument('--json', action='store_true', help="输出 JSON 而不是表格")
+    args = parser.parse_args()
+
+    rows = summarize(read_records(args.log), sort=args.sort, top=args.top)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2, default=str))
+        return
+    if not rows:
+        print("没有慢查询记录")
+        return
+    for i, row in enumerate(rows, 1):
+        print(f"{i:3d}. {row['caller']}  次数 {row['count']}  总计 {row['total_ms']:.1f}ms  "
+              f"平均 {row['avg_ms']:.1f}ms  p95 {row['p95_ms']:.1f}ms  最大 {row['max_ms']:.1f}ms")
+        print(f"     {row['shape'][:200]}")
+        if row['explain']:
+            print(f"     EXPLAIN: {json.dumps(row['explain'], ensure_ascii=False, default=str)[:300]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# common/soft_delete.py
+"""
+用户 / 论文的软删除与后台分块清理
+
+- 删除请求只给行打上 deleted_at 并提交（单行 UPDATE），ORM 查询随即看不到它（过滤见 user.models.SoftDeleteMixin）；
+- 后台线程按 PURGE_CHUNK_SIZE 分块删除其 paper_clicks（先按主键取一块 id，再按 id 删除，每块单独提交），
+  块之间休眠 PURGE_CHUNK_SLEEP_MS 毫秒，避免一次大 DELETE 长时间锁住 paper_clicks；
+- 点击清理完后，在同一事务里清掉期间新写入的点击并物理删除该行（paper_keywords / user_tasks 由外键级联删除），
+  外键冲突时重试；
+- 任务进度在内存中保存，最近 PURGE_JOB_HISTORY 个可通过接口查询；任务 id 为 "<user|paper>-<主键>"。
+进程重启后，首个请求会把仍带 deleted_at 的行重新排队；多进程部署时各进程可能重复清理同一行，分块删除是幂等的。
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy.exc import IntegrityError
+
+from user.models import db, User, Paper, PaperClick
+from common.keyword_stats import keyword_cloud
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_SLEEP_MS = 100
+DEFAULT_JOB_HISTORY = 200
+FINAL_DELETE_ATTEMPTS = 3
+
+# 任务类型 -> (模型, 主键列, paper_clicks 中的外键列)
+TARGETS = {
+    "user": (User, User.user_id, PaperClick.user_id),
+    "paper": (Paper, Paper.paper_id, PaperClick.paper_id),
+}
+
+
+def job_id_for(kind, target_id):
+    return f"{kind}-{target_id}"
+
+
+class PurgeJob:
+    __slots__ = ('job_id', 'kind', 'target_id', 'college_id', 'status', 'total_clicks', 'purged_clicks',
+                 'chunks', 'error', 'created_at', 'started_at', 'finished_at')
+
+    def __init__(self, kind, target_id, college_id=None):
+        self.job_id = job_id_for(kind, target_id)
+        self.kind = kind
+        self.target_id = target_id
+        self.college_id = college_id
+        self.status = 'pending'
+        self.total_clicks = None
+        self.purged_clicks = 0
+        self.chunks = 0
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        progress = None
+        if self.status == 'done':
+            progress = 1.0
+        elif self.total_clicks:
+            progress = round(min(self.purged_clicks / self.total_clicks, 1.0), 4)
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "target_id": self.target_id,
+            "status": self.status,
+            "total_clicks": self.total_clicks,
+            "purged_clicks": self.purged_clicks,
+            "chunks": self.chunks,
+            "progress": progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class PurgeJobs:
+    """单个后台线程顺序执行清理任务"""
+
+    def __init__(self):
+        self._app = None
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._recovered = False
+
+    def _config(self, key, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    # ---------- 提交 / 查询 ----------
+    def submit(self, kind, target_id, college_id=None):
+        job = PurgeJob(kind, target_id, college_id)
+        with self._lock:
+            existing = self._jobs.get(job.job_id)
+            if existing is not None and existing.status in ('pending', 'running'):
+                return existing
+            self._jobs.pop(job.job_id, None)
+            self._jobs[job.job_id] = job
+            self._trim()
+        self._queue.put(job)
+        self._ensure_worker()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _trim(self):
+        limit = self._config('PURGE_JOB_HISTORY', DEFAULT_JOB_HISTORY)
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - limit)]:
+            del self._jobs[job_id]
+
+    # ---------- 后台线程 ----------
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._app is None:
+                self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._worker, name="purge-jobs", daemon=True)
+            self._thread.start()
+
+    def recover(self):
+        """把上次进程退出时未清理完的软删除行重新排队（每个进程只执行一次）"""
+        if self._recovered:
+            return
+        self._recovered = True
+        try:
+            for kind, (model, pk, _) in TARGETS.items():
+                pending = db.session.query(pk).execution_options(include_deleted=True
+                                                                ).filter(model.deleted_at.isnot(None)).all()
+                for (target_id,) in pending:
+                    self.submit(kind, target_id)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"恢复未完成的清理任务失败: {e}")
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            with self._app.app_context():
+                try:
+                    self._run(job)
+                except Exception as e:
+                    db.session.rollback()
+                    job.status = 'failed'
+                    job.error = str(e)
+                    logger.error(f"清理任务 {job.job_id} 失败: {e}")
+                finally:
+                    job.finished_at = datetime.utcnow()
+                    db.session.remove()
+
+    def _run(self, job):
+        model, pk, click_column = TARGETS[job.kind]
+        chunk_size = self._config('PURGE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        pause = self._config('PURGE_CHUNK_SLEEP_MS', DEFAULT_CHUNK_SLEEP_MS) / 1000
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        job.total_clicks = db.session.query(db.func.count(PaperClick.click_id)).filter(
+            click_column == job.target_id).scalar()
+
+        while True:
+            click_ids = [row[0] for row in db.session.query(PaperClick.click_id).filter(
+                click_column == job.target_id).order_by(PaperClick.click_id).limit(chunk_size).all()]
+            if not click_ids:
+                break
+            PaperClick.query.filter(PaperClick.click_id.in_(click_ids)).delete(synchronize_session=False)
+            db.session.commit()
+            job.purged_clicks += len(click_ids)
+            job.chunks += 1
+            if pause:
+                time.sleep(pause)
+
+        # 最后一块之后仍可能有并发写入的点击：与删除该行放在同一事务里再清一次，外键冲突时重试
+        for attempt in range(1, FINAL_DELETE_ATTEMPTS + 1):
+            try:
+                remaining = PaperClick.query.filter(click_column == job.target_id).delete(synchronize_session=False)
+                # 只删仍处于软删除状态的行
+                db.session.query(model).filter(pk == job.target_id, model.deleted_at.isnot(None)
+                                               ).delete(synchronize_session=False)
+                db.session.commit()
+                job.purged_clicks += remaining
+                break
+            except IntegrityError:
+                db.session.rollback()
+                if attempt == FINAL_DELETE_ATTEMPTS:
+                    raise
+                logger.warning(f"清理任务 {job.job_id} 删除行时外键冲突，重试第 {attempt} 次")
+                time.sleep(pause)
+        if job.kind == 'paper':
+            # paper_keywords 级联删除后关键词计数由触发器更新
+            keyword_cloud.invalidate()
+        job.status = 'done'
+        logger.info(f"清理任务 {job.job_id} 完成: 删除 {job.purged_clicks} 条点击记录, {job.chunks} 块")
+
+
+purge_jobs = PurgeJobs()
+
+
+def soft_delete(obj):
+    """给用户 / 论文打删除标记并提交，返回后台清理任务"""
+    kind = 'user' if isinstance(obj, User) else 'paper'
+    target_id = obj.user_id if kind == 'user' else obj.paper_id
+    college_id = obj.college_id if kind == 'user' else None
+    obj.deleted_at = datetime.utcnow()
+    db.session.commit()
+    return purge_jobs.submit(kind, target_id, college_id)
+
+
+def init_soft_delete(app):
+    """首个请求时恢复未完成的清理任务"""
+
+    @app.before_request
+    def resume_purge_jobs():
+        if not purge_jobs._recovered:
+            purge_jobs.recover()
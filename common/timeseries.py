@@ -0,0 +1,86 @@
+# common/timeseries.py
+"""
+点击时间序列的向量化分桶工具
+
+时间统一用 UTC 纪元秒（int64）表示，click_time 入库时即为 datetime.utcnow()。
+分桶全部由 NumPy 完成：有序数组走 searchsorted，无序数组走 bincount。
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+GRANULARITY_SECONDS = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+
+# 未指定 from 时默认回看的桶数
+DEFAULT_BUCKETS = {
+    "hour": 48,
+    "day": 30,
+    "week": 26,
+}
+
+# 单次请求允许的最大桶数
+MAX_BUCKETS = 5000
+
+# 周桶从周一 00:00 开始：1970-01-05 是周一
+WEEK_ORIGIN = 4 * 86400
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value):
+    """naive UTC datetime -> 纪元秒"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((value - _EPOCH).total_seconds())
+
+
+def from_epoch(seconds):
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+
+def floor_to_bucket(seconds, granularity):
+    step = GRANULARITY_SECONDS[granularity]
+    origin = WEEK_ORIGIN if granularity == "week" else 0
+    return origin + (seconds - origin) // step * step
+
+
+def bucket_edges(start, end, granularity):
+    """
+    返回覆盖 [start, end) 的桶起点数组（纪元秒，int64）
+    start 向下对齐到桶边界，end 向上取整
+    """
+    step = GRANULARITY_SECONDS[granularity]
+    first = floor_to_bucket(start, granularity)
+    count = max(1, -(-(end - first) // step))
+    if count > MAX_BUCKETS:
+        raise ValueError(f"时间范围过大：{count} 个桶，超过上限 {MAX_BUCKETS}")
+    return first + np.arange(count, dtype=np.int64) * step
+
+
+def bucket_counts(timestamps, edges, granularity, assume_sorted=False):
+    """
+    统计每个桶内的时间戳个数，缺失的桶自然为 0
+    timestamps: int64 纪元秒数组；edges: bucket_edges 的返回值
+    """
+    step = GRANULARITY_SECONDS[granularity]
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if len(edges) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if assume_sorted:
+        bounds = np.append(edges, edges[-1] + step)
+        positions = np.searchsorted(timestamps, bounds, side="left")
+        return np.diff(positions).astype(np.int64)
+
+    offsets = timestamps - edges[0]
+    in_range = (offsets >= 0) & (offsets < len(edges) * step)
+    return np.bincount(offsets[in_range] // step, minlength=len(edges)).astype(np.int64)
+
+
+def format_edges(edges):
+    """桶起点 -> ISO 字符串列表（UTC）"""
+    return np.datetime_as_string(edges.astype("datetime64[s]")).tolist()
@@ -2,7 +2,7 @@
 import os
 
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'none'
+    SECRET_KEY = os.environ.get('SECRET_KEY', '')
 
     SQLALCHEMY_DATABASE_URI = (
         f"mysql+pymysql://{os.environ.get('MYSQL_USER', 'root')}:"
@@ -12,4 +12,75 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    WTF_CSRF_ENABLED = False
\ No newline at end of file
+
+    # 连接池：常驻连接数、允许溢出的额外连接数、取连接超时（秒）、
+    # 连接最长复用时间（秒，需小于 MySQL wait_timeout）、取连接前先 ping 检测失效连接
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+
+    # 只读从库（为空则不做读写分离）；写操作后该客户端继续读主库的秒数；从库出错后暂停使用的秒数
+    DB_REPLICA_URI = os.environ.get('DB_REPLICA_URI', '')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+
+    # 按请求统计 SQL：非调试模式下也输出 X-DB-Queries / X-DB-Time 响应头；
+    # 同一语句在一个请求内重复超过该次数时告警（0 表示不检测）
+    DB_QUERY_HEADERS = os.environ.get('DB_QUERY_HEADERS', 'false').lower() == 'true'
+    DB_REPEAT_WARN_THRESHOLD = int(os.environ.get('DB_REPEAT_WARN_THRESHOLD', 10))
+
+    # 慢查询日志：阈值（毫秒，0 表示关闭）、EXPLAIN 抽样比例、日志路径、单文件大小上限和保留份数
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_EXPLAIN_SAMPLE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE', 0.1))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'logs/slow_query.log')
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+
+    # 请求指标（按路由的延迟直方图 / 状态码 / 进行中请求数），在 /metrics 以 Prometheus 格式暴露
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # 按需请求剖析：请求头 X-Profile 需携带的密钥（为空则不接受请求头触发）、每 N 个请求抽样一个（0 关闭）、
+    # 默认格式（prof / collapsed）、调用栈采样间隔（毫秒）、输出目录和最多保留的文件数
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    PROFILE_SAMPLE_EVERY = int(os.environ.get('PROFILE_SAMPLE_EVERY', 0))
+    PROFILE_FORMAT = os.environ.get('PROFILE_FORMAT', 'prof')
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', 'logs/profiles')
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 50))
+
+    # 身份令牌：签名密钥（为空则用 SECRET_KEY）、有效期（秒）、吊销表最多记录的用户数
+    AUTH_TOKEN_SECRET = os.environ.get('AUTH_TOKEN_SECRET', '')
+    AUTH_TOKEN_TTL = int(os.environ.get('AUTH_TOKEN_TTL', 7 * 24 * 3600))
+    AUTH_REVOKED_CACHE_SIZE = int(os.environ.get('AUTH_REVOKED_CACHE_SIZE', 10000))
+
+    # 密码哈希：算法与成本参数、进程池大小（0 表示在请求线程内计算）、最多同时排队的任务数、等待名额的秒数
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_WAIT_SECONDS = float(os.environ.get('PASSWORD_HASH_WAIT_SECONDS', 5))
+
+    # 学院 / 分类参考数据缓存重新读取的间隔（秒）
+    REFERENCE_DATA_CHECK_INTERVAL = int(os.environ.get('REFERENCE_DATA_CHECK_INTERVAL', 60))
+
+    # 删除用户 / 论文后清理点击记录：每块行数、块之间休眠的毫秒数、保留的任务记录数
+    PURGE_CHUNK_SIZE = int(os.environ.get('PURGE_CHUNK_SIZE', 1000))
+    PURGE_CHUNK_SLEEP_MS = int(os.environ.get('PURGE_CHUNK_SLEEP_MS', 100))
+    PURGE_JOB_HISTORY = int(os.environ.get('PURGE_JOB_HISTORY', 200))
+
+    WTF_CSRF_ENABLED = False
+
+    # 论文分类/年份直方图的全量重载间隔（秒），0 表示只依赖增量调整
+    PAPER_STATS_TTL = int(os.environ.get('PAPER_STATS_TTL', 600))
+
+    # 词云缓存检查 keywords 表指纹的间隔（秒）
+    KEYWORD_STATS_CHECK_INTERVAL = int(os.environ.get('KEYWORD_STATS_CHECK_INTERVAL', 60))
+
+    # paper_clicks 列式快照：是否启用、增量追加间隔、全量重建间隔（秒）
+    # 关闭后点击时间序列改为数据库 GROUP BY 的降级路径，耗时随范围内点击数线性增长
+    CLICK_SNAPSHOT_ENABLED = os.environ.get('CLICK_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    CLICK_SNAPSHOT_REFRESH_INTERVAL = int(os.environ.get('CLICK_SNAPSHOT_REFRESH_INTERVAL', 30))
+    CLICK_SNAPSHOT_REBUILD_INTERVAL = int(os.environ.get('CLICK_SNAPSHOT_REBUILD_INTERVAL', 3600))
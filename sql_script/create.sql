@@ -19,7 +19,9 @@ CREATE TABLE users (
     college_id INT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    deleted_at DATETIME NULL,           -- 软删除标记，后台清理完点击记录后物理删除
     
+    INDEX idx_deleted_at (deleted_at),
     FOREIGN KEY (college_id) REFERENCES colleges(college_id)
 );
 
@@ -41,7 +43,9 @@ CREATE TABLE papers (
     pdf_url VARCHAR(500) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    deleted_at DATETIME NULL,           -- 软删除标记
     
+    INDEX idx_deleted_at (deleted_at),
     FOREIGN KEY (category_id) REFERENCES categories(category_id)
 );
 
@@ -49,7 +53,9 @@ CREATE TABLE papers (
 CREATE TABLE keywords (
     keyword_id INT PRIMARY KEY AUTO_INCREMENT,
     word VARCHAR(100) NOT NULL UNIQUE,
-    total_count INT DEFAULT 0
+    total_count INT DEFAULT 0,
+
+    INDEX idx_total_count (total_count)
 );
 
 -- 6. 论文-关键词关联表（多对多）
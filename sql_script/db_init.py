@@ -1,8 +1,19 @@
+import argparse
+import codecs
+import hashlib
 import json
+import multiprocessing
+import os
 import re
 import mysql.connector
+import shutil
 import sys
-from collections import Counter
+import tempfile
+import time
+import zlib
+from collections import Counter, deque
+
+import numpy as np
 
 
 # ======================
@@ -71,13 +82,14 @@ def tokenize(text):
     return [w for w in words if w not in STOP_WORDS]
 
 
-def get_connection():
+def get_connection(**options):
     return mysql.connector.connect(
         host='localhost',
         user='root',
         password='123456',
         database='paper_sys',
-        autocommit=False
+        autocommit=False,
+        **options
     )
 
 
@@ -104,80 +116,965 @@ def extract_top_keywords(abstract, top_n=5):
 
 
 # ======================
-# 主函数
+# 流式读取
 # ======================
 
-def process_json(json_path):
-    skipped_duplicate = 0
+READ_CHUNK = 1 << 20  # 每次从磁盘读 1MB
+MAX_RECORD_BYTES = 64 << 20  # 单条记录上限；超过仍未解析出完整记录视为文件损坏 / 截断，避免缓冲区无限增长
+
+
+def iter_json_records(json_path, start_index=0, start_offset=0):
+    """
+    逐条解析论文记录，内存只与单条记录大小有关
+    支持 JSON 数组（[{...}, {...}]）和 NDJSON（每行一个对象），按首个非空字符自动识别
+    yield (记录序号, 该记录结束处的字节偏移, 记录)
+    start_index/start_offset 来自断点，直接 seek 到该记录之后继续解析
+    """
+    with open(json_path, 'rb') as f:
+        head = f.read(READ_CHUNK)
+        first = head.lstrip()[:1]
+        f.seek(start_offset)
+        if first == b'[':
+            yield from _iter_json_array(f, start_index, start_offset)
+        else:
+            yield from _iter_ndjson(f, start_index, start_offset)
+
+
+def _iter_ndjson(f, start_index=0, start_offset=0):
+    offset = start_offset
+    index = start_index
+    while True:
+        line = f.readline(MAX_RECORD_BYTES + 1)
+        if not line:
+            return
+        if len(line) > MAX_RECORD_BYTES:
+            raise ValueError(f"JSON 格式错误：字节偏移 {offset} 处的行超过 {MAX_RECORD_BYTES} 字节")
+        offset += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        index += 1
+        yield index, offset, json.loads(line)
+
+
+def _iter_json_array(f, start_index=0, start_offset=0):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    offset = start_offset   # buf[pos] 对应的文件字节偏移
+    index = start_index
+    eof = False
+    started = start_offset > 0
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(READ_CHUNK)
+        if not chunk:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b'', final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+
+    while True:
+        # 跳过空白、数组起始符和分隔逗号
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,[':
+                if buf[pos] == '[':
+                    if started:
+                        raise ValueError(f"JSON 格式错误：字节偏移 {offset} 处出现嵌套数组")
+                    started = True
+                offset += len(buf[pos].encode('utf-8'))
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            fill()
+
+        if pos >= len(buf) or buf[pos] == ']':
+            return
+
+        while True:
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # 按字符数近似字节数即可：只用于拦截损坏文件
+                if len(buf) - pos > MAX_RECORD_BYTES:
+                    raise ValueError(f"JSON 格式错误：字节偏移 {offset} 处的记录超过 {MAX_RECORD_BYTES} 字节仍未结束"
+                                     f"（文件损坏或被截断）")
+                fill()
+
+        offset += len(buf[pos:end].encode('utf-8'))
+        pos = end
+        index += 1
+        yield index, offset, record
+
+
+class ImportProgress:
+    """定期打印导入速度（条/秒）和文件进度"""
+
+    def __init__(self, total_bytes, every=10000, start_count=0):
+        self.total_bytes = max(total_bytes, 1)
+        self.every = every
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.start_count = start_count
+        self.last_count = start_count
+
+    def update(self, count, offset):
+        if self.every <= 0 or count % self.every:
+            return
+        now = time.perf_counter()
+        recent = (count - self.last_count) / max(now - self.last_report, 1e-9)
+        overall = (count - self.start_count) / max(now - self.started, 1e-9)
+        print(f"⏳ 已处理 {count} 条 | 当前 {recent:.0f} 条/秒 | 平均 {overall:.0f} 条/秒 | "
+              f"{offset / self.total_bytes * 100:.1f}%")
+        self.last_report = now
+        self.last_count = count
+
+    def finish(self, count):
+        elapsed = time.perf_counter() - self.started
+        done = count - self.start_count
+        print(f"⏱ 本次处理 {done} 条，用时 {elapsed:.1f}s，平均 {done / max(elapsed, 1e-9):.0f} 条/秒")
+
+
+def load_records(json_path, stream=False, start_index=0, start_offset=0):
+    """
+    返回 (记录迭代器, 总数或 None)；stream=True 时不把整个文件读入内存
+    从断点恢复时跳过前 start_index 条（流式模式直接 seek 到 start_offset）
+    """
+    if stream:
+        return iter_json_records(json_path, start_index, start_offset), None
+
     print("正在加载 JSON 数据...")
     with open(json_path, 'r', encoding='utf-8') as f:
         records = json.load(f)
     print(f"✅ 成功加载 {len(records)} 条论文记录")
+    return ((i, 0, rec) for i, rec in enumerate(records, 1) if i > start_index), len(records)
+
+
+# ======================
+# 断点续传
+# ======================
+
+class ImportCheckpoint:
+    """
+    每提交一批就把进度写入 JSON 文件（先写临时文件再原子替换）：
+    已处理到的记录序号 / 字节偏移、批次号和累计计数。
+    记录了源文件大小和修改时间，文件变化后拒绝续传；
+    还记录了读取模式（stream / full）：非流式模式不产生字节偏移（记为 0），换模式续传会从文件头错位解析，因此拒绝。
+    """
+
+    def __init__(self, path, json_path, stream=False):
+        self.path = path
+        self.json_path = json_path
+        self.mode = 'stream' if stream else 'full'
+        stat = os.stat(json_path)
+        self.source = {"file": os.path.abspath(json_path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    @property
+    def idf_path(self):
+        return self.path + '.idf.npy'
+
+    def load(self):
+        """读取断点；不存在时返回 None，源文件变化或读取模式不同时抛出 ValueError"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("source") != self.source:
+            raise ValueError(f"断点 {self.path} 对应的源文件已变化，无法续传")
+        # 旧断点没有 mode：已处理记录但偏移为 0 的只可能来自非流式模式
+        mode = state.get("mode") or ('full' if state.get("record_index") and not state.get("offset") else 'stream')
+        if mode != self.mode:
+            flag = "加上" if mode == 'stream' else "去掉"
+            raise ValueError(f"断点 {self.path} 由 {mode} 模式生成，当前为 {self.mode} 模式，"
+                             f"请{flag} --stream 后再续传")
+        return state
+
+    def save(self, **state):
+        state["source"] = self.source
+        state["mode"] = self.mode
+        state["saved_at"] = time.strftime('%Y-%m-%d %H:%M:%S')
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+# ======================
+# 增量导入：arxiv_id 布隆过滤器
+# ======================
+
+class ArxivIdBloom:
+    """
+    已入库 arxiv_id 的布隆过滤器，持久化为 .npz（位数组 + 覆盖到的最大 paper_id）
+    - 判定“不存在”一定准确，可直接当新记录处理；判定“可能存在”才去数据库确认；
+    - watermark 记录已覆盖的最大 paper_id，下次运行只需补读其后新增的论文，
+      中途崩溃或用其它方式导入的数据也能自动补齐。
+    """
+
+    def __init__(self, capacity, fp_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.m = max(int(-capacity * np.log(fp_rate) / (np.log(2) ** 2)), 64)
+        self.k = max(int(round(self.m / capacity * np.log(2))), 1)
+        self.bits = np.zeros(self.m, dtype=bool)
+        self.count = 0
+        self.watermark = 0
+
+    def _positions(self, arxiv_ids):
+        # 双重哈希：blake2b 的 128 位摘要拆成 h1、h2，第 j 个位置为 h1 + j*h2（uint64 溢出即取模）
+        digests = b''.join(hashlib.blake2b(a.encode('utf-8'), digest_size=16).digest() for a in arxiv_ids)
+        h = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+        j = np.arange(self.k, dtype=np.uint64)
+        return (h[:, :1] + j * (h[:, 1:] | np.uint64(1))) % np.uint64(self.m)
+
+    def add_many(self, arxiv_ids):
+        if arxiv_ids:
+            self.bits[self._positions(arxiv_ids)] = True
+            self.count += len(arxiv_ids)
 
-    conn = get_connection()
+    def might_contain(self, arxiv_ids):
+        """返回布尔数组；False 表示一定未入库"""
+        if not arxiv_ids:
+            return np.zeros(0, dtype=bool)
+        return self.bits[self._positions(arxiv_ids)].all(axis=1)
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, bits=np.packbits(self.bits),
+                     meta=np.array([self.capacity, self.m, self.k, self.count, self.watermark], dtype=np.int64),
+                     fp_rate=np.array(self.fp_rate))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            capacity, m, k, count, watermark = (int(v) for v in data['meta'])
+            bloom = cls(capacity, float(data['fp_rate']))
+            bloom.m, bloom.k, bloom.count, bloom.watermark = m, k, count, watermark
+            bloom.bits = np.unpackbits(data['bits'], count=m).astype(bool)
+        return bloom
+
+
+def _scan_arxiv_ids(cur, after_paper_id, fetch_size=50000):
+    """按 paper_id 顺序读取 after_paper_id 之后的论文，yield (arxiv_id 列表, 本块最大 paper_id)"""
+    cur.execute("SELECT paper_id, arxiv_id FROM papers WHERE paper_id > %s ORDER BY paper_id",
+                (after_paper_id,))
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield [arxiv_id for _, arxiv_id in rows], rows[-1][0]
+
+
+def sync_bloom(conn, path, fp_rate=0.001):
+    """加载布隆过滤器并补齐 watermark 之后新增的论文；不存在或容量不足时从全表重建"""
     cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM papers")
+    db_count = cur.fetchone()[0]
+
+    bloom = ArxivIdBloom.load(path) if os.path.exists(path) else None
+    if bloom is not None and db_count > bloom.capacity:
+        print(f"ℹ 布隆过滤器容量不足（{bloom.capacity} < {db_count}），重建")
+        bloom = None
+    if bloom is None:
+        # 预留一倍余量，日常增量不必频繁重建
+        bloom = ArxivIdBloom(max(db_count * 2, 1000000), fp_rate)
+
+    started = time.perf_counter()
+    added = 0
+    for arxiv_ids, max_paper_id in _scan_arxiv_ids(cur, bloom.watermark):
+        bloom.add_many(arxiv_ids)
+        bloom.watermark = max_paper_id
+        added += len(arxiv_ids)
+    cur.close()
+    if added:
+        bloom.save(path)
+    print(f"🌸 布隆过滤器: {bloom.count} 个 arxiv_id（本次补入 {added}），"
+          f"{bloom.m // 8 // 1024} KB，k={bloom.k}，用时 {time.perf_counter() - started:.1f}s")
+    return bloom
+
+
+def delta_filter(records, bloom, conn, window=5000):
+    """
+    过滤已入库的记录：布隆过滤器判定一定不存在的直接放行，可能存在的按窗口批量查库确认
+    已入库的记录替换为 PREPARE_KNOWN，保持序号和偏移顺序不变，便于断点和计数
+    """
+    cur = conn.cursor()
+    stats = {"checked": 0, "maybe": 0, "known": 0}
+    for chunk in _chunked(records, window):
+        ids = [rec.get('arxiv_id', '').strip() if isinstance(rec, dict) else '' for _, _, rec in chunk]
+        present = [a for a in ids if a]
+        candidates = sorted({a for a, hit in zip(present, bloom.might_contain(present)) if hit})
+        known = set()
+        if candidates:
+            cur.execute(f"SELECT arxiv_id FROM papers WHERE arxiv_id IN ({_placeholders(len(candidates))})",
+                        candidates)
+            known = {row[0] for row in cur.fetchall()}
+        stats["checked"] += len(chunk)
+        stats["maybe"] += len(candidates)
+        stats["known"] += len(known)
+        for (i, offset, rec), arxiv_id in zip(chunk, ids):
+            yield i, offset, (PREPARE_KNOWN if arxiv_id in known else rec)
+    cur.close()
+    print(f"🌸 增量过滤: {stats['checked']} 条，需查库 {stats['maybe']} 条，已入库 {stats['known']} 条")
+
+
+# ======================
+# 主函数
+# ======================
+
+def normalize_record(rec):
+    """
+    规范化一条记录（不访问数据库）
+    返回 papers 各列组成的 row（分类为 code），缺少必要字段时返回 None
+    """
+    title = rec.get('title', '').strip()
+    arxiv_id = rec.get('arxiv_id', '').strip()
+    doi = rec.get('doi', '').strip() or None
+    pdf_url = rec.get('link', '').strip()
+    abstract = rec.get('summary', rec.get('abstract', '')).strip()
+    category_code = rec.get('category', 'cs.GEN').strip() or 'cs.GEN'
+
+    if not (title and arxiv_id and pdf_url):
+        return None
+    return (title, arxiv_id, doi, category_code, abstract, pdf_url)
+
+
+# ======================
+# 语料级 TF-IDF 关键词
+# ======================
+
+class TfidfModel:
+    """
+    语料级 TF-IDF 关键词提取
+    - 词经 crc32 映射到 2^hash_bits 个桶，文档频率数组大小固定，与语料规模和词表大小无关；
+    - 每块摘要先构造稀疏词-文档矩阵（COO：文档下标、词下标、词频），再用 NumPy 整块计算；
+    - 文档频率低于 min_df 的词（多为拼写错误、公式碎片）不作为关键词。
+    """
+
+    def __init__(self, hash_bits=22, min_df=2):
+        self.size = 1 << hash_bits
+        self.min_df = min_df
+        self.df = np.zeros(self.size, dtype=np.int64)
+        self.n_docs = 0
+        self.idf = None
+
+    @staticmethod
+    def term_matrix(abstracts, size):
+        """
+        分词并返回块内稀疏矩阵：(文档下标, 块内词下标, 块内词表, 词的哈希桶)
+        """
+        vocab = {}
+        term_idx = []
+        lengths = []
+        for text in abstracts:
+            ids = [vocab.setdefault(token, len(vocab)) for token in tokenize(text)] if text else []
+            term_idx.extend(ids)
+            lengths.append(len(ids))
+        words = list(vocab)
+        buckets = np.fromiter((zlib.crc32(w.encode('utf-8')) for w in words),
+                              dtype=np.int64, count=len(words)) % size
+        doc_idx = np.repeat(np.arange(len(abstracts), dtype=np.int64), lengths)
+        return doc_idx, np.asarray(term_idx, dtype=np.int64), words, buckets
+
+    @staticmethod
+    def chunk_doc_buckets(abstracts, size):
+        """一块摘要中每个 (文档, 词) 只计一次，返回这些词的哈希桶，用于累加文档频率"""
+        doc_idx, term_idx, _, buckets = TfidfModel.term_matrix(abstracts, size)
+        pairs = np.unique((doc_idx << 32) | term_idx)
+        return buckets[pairs & 0xFFFFFFFF], len(abstracts)
+
+    def add_doc_buckets(self, doc_buckets, n_docs):
+        self.df += np.bincount(doc_buckets, minlength=self.size)
+        self.n_docs += n_docs
+
+    def finalize(self):
+        # 不加常规平滑里的 +1：出现在几乎所有摘要里的泛用词权重趋近 0
+        idf = np.log((1 + self.n_docs) / (1 + self.df))
+        idf[self.df < self.min_df] = 0
+        self.idf = idf.astype(np.float32)
+        # 拟合后只保留 idf，减少传给子进程的数据量
+        self.df = None
+        return self
+
+    def top_keywords(self, abstracts, top_n=5):
+        """按 TF-IDF 为每篇摘要选 top_n 个关键词，返回与 abstracts 对齐的列表"""
+        result = [[] for _ in abstracts]
+        doc_idx, term_idx, words, buckets = self.term_matrix(abstracts, self.size)
+        if not len(term_idx):
+            return result
+
+        keys, tf = np.unique((doc_idx << 32) | term_idx, return_counts=True)
+        docs = keys >> 32
+        terms = keys & 0xFFFFFFFF
+        weights = tf * self.idf[buckets[terms]]
+        keep = weights > 0
+        docs, terms, weights = docs[keep], terms[keep], weights[keep]
+
+        # 文档升序、权重降序、同权重按词首次出现先后
+        order = np.lexsort((terms, -weights, docs))
+        docs_sorted = docs[order]
+        rank = np.arange(len(order)) - np.searchsorted(docs_sorted, docs_sorted, side='left')
+        selected = order[rank < top_n]
+        for doc, term in zip(docs[selected].tolist(), terms[selected].tolist()):
+            result[doc].append(words[term])
+        return result
+
+
+def _placeholders(n):
+    return ', '.join(['%s'] * n)
+
+
+class BatchWriter:
+    """
+    批量写入：已有 arxiv_id / 分类 / 关键词预加载到内存，
+    每 batch_size 篇论文用 executemany 多行插入并只提交一次。
+    某一批失败时回滚，再按原来的逐条逻辑重放该批，保证成功/跳过计数不变。
+    """
 
-    success = 0
-    for i, rec in enumerate(records, 1):
+    def __init__(self, conn, batch_size=1000, checkpoint=None, resume_state=None, preload_arxiv_ids=True):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.batch_size = batch_size
+        self.pending = []
+        self.pending_arxiv_ids = set()
+        self.checkpoint = checkpoint
+        state = resume_state or {}
+        self.success = state.get("success", 0)
+        self.skipped_duplicate = state.get("skipped_duplicate", 0)
+        self.batches = state.get("batch_id", 0)
+        # 已完全处理（入库、跳过或已放入待提交批次）的最后一条记录
+        self.position = (state.get("record_index", 0), state.get("offset", 0))
+        self._preload(preload_arxiv_ids)
+
+    def _preload(self, preload_arxiv_ids=True):
+        cur = self.cur
+        # 增量模式由布隆过滤器在上游去重，这里只记录本次运行提交过的 arxiv_id
+        self.known_arxiv_ids = set()
+        if preload_arxiv_ids:
+            cur.execute("SELECT arxiv_id FROM papers")
+            self.known_arxiv_ids = {row[0] for row in cur}
+        cur.execute("SELECT code, category_id FROM categories")
+        self.category_ids = dict(cur.fetchall())
+        cur.execute("SELECT word, keyword_id FROM keywords")
+        self.keyword_ids = dict(cur.fetchall())
+        print(f"📦 预加载: {len(self.known_arxiv_ids)} 篇论文, {len(self.category_ids)} 个分类, "
+              f"{len(self.keyword_ids)} 个关键词")
+
+    def add(self, row, keywords, position=None):
+        """加入一篇待插入论文；已入库的 arxiv_id 直接跳过。position 为 (记录序号, 字节偏移)"""
+        arxiv_id = row[1]
+        if arxiv_id in self.pending_arxiv_ids:
+            # 同一批内重复：先落库前一条，它成功与否决定这一条是否算重复
+            self.flush()
+        if position is not None:
+            self.position = position
+        if arxiv_id in self.known_arxiv_ids:
+            self.skipped_duplicate += 1
+            return
+        self.pending_arxiv_ids.add(arxiv_id)
+        self.pending.append((row, keywords))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def skip(self, position, duplicate=False):
+        """记录被跳过（缺字段、增量模式下已入库等），只推进断点位置"""
+        self.position = position
+        if duplicate:
+            self.skipped_duplicate += 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.pending_arxiv_ids = set()
+        try:
+            category_ids, keyword_ids = self._write_batch(batch)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            print(f"⚠ 第 {self.batches + 1} 批写入失败，改为逐条写入: {e}")
+            for row, keywords in batch:
+                if self._write_one(row, keywords):
+                    self.success += 1
+        else:
+            # 只有提交成功后才把新论文 / 分类 / 关键词并入内存映射
+            self.known_arxiv_ids.update(row[1] for row, _ in batch)
+            self.category_ids.update(category_ids)
+            self.keyword_ids.update(keyword_ids)
+            self.success += len(batch)
+        self.batches += 1
+        self.save_checkpoint()
+
+    def save_checkpoint(self, completed=False):
+        if self.checkpoint is None:
+            return
+        record_index, offset = self.position
+        self.checkpoint.save(
+            record_index=record_index,
+            offset=offset,
+            batch_id=self.batches,
+            success=self.success,
+            skipped_duplicate=self.skipped_duplicate,
+            completed=completed
+        )
+
+    def _write_batch(self, batch):
+        cur = self.cur
+
+        # 1. 新分类
+        category_ids = {}
+        new_codes = sorted({row[3] for row, _ in batch} - self.category_ids.keys())
+        if new_codes:
+            cur.executemany(
+                "INSERT INTO categories (code, name) VALUES (%s, %s)",
+                [(code, ARXIV_CATEGORY_NAMES.get(code, f"Unknown Category: {code}")) for code in new_codes]
+            )
+            cur.execute(f"SELECT code, category_id FROM categories WHERE code IN ({_placeholders(len(new_codes))})",
+                        new_codes)
+            category_ids = dict(cur.fetchall())
+
+        def category_id_of(code):
+            return self.category_ids.get(code) or category_ids[code]
+
+        # 2. 论文（多行插入），再一次性取回 paper_id
+        cur.executemany("""
+            INSERT INTO papers (title, arxiv_id, doi, category_id, abstract, pdf_url)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [(title, arxiv_id, doi, category_id_of(code), abstract, pdf_url)
+              for (title, arxiv_id, doi, code, abstract, pdf_url), _ in batch])
+        arxiv_ids = [row[1] for row, _ in batch]
+        cur.execute(f"SELECT arxiv_id, paper_id FROM papers WHERE arxiv_id IN ({_placeholders(len(arxiv_ids))})",
+                    arxiv_ids)
+        paper_ids = dict(cur.fetchall())
+
+        # 3. 新关键词
+        keyword_ids = {}
+        new_words = sorted({w for _, keywords in batch for w in keywords} - self.keyword_ids.keys())
+        if new_words:
+            cur.executemany("INSERT IGNORE INTO keywords (word) VALUES (%s)", [(w,) for w in new_words])
+            cur.execute(f"SELECT word, keyword_id FROM keywords WHERE word IN ({_placeholders(len(new_words))})",
+                        new_words)
+            keyword_ids = dict(cur.fetchall())
+
+        # 4. 论文-关键词关联（防重复）
+        links = [
+            (paper_ids[row[1]], self.keyword_ids.get(word) or keyword_ids[word])
+            for row, keywords in batch for word in keywords
+        ]
+        if links:
+            cur.executemany("INSERT IGNORE INTO paper_keywords (paper_id, keyword_id) VALUES (%s, %s)", links)
+
+        return category_ids, keyword_ids
+
+    def _write_one(self, row, keywords):
+        """原逐条导入逻辑，只在整批失败时使用"""
+        conn, cur = self.conn, self.cur
+        title, arxiv_id, doi, category_code, abstract, pdf_url = row
         try:
-            title = rec.get('title', '').strip()
-            arxiv_id = rec.get('arxiv_id', '').strip()
-            doi = rec.get('doi', '').strip() or None
-            pdf_url = rec.get('link', '').strip()
-            abstract = rec.get('summary', rec.get('abstract', '')).strip()
-            category_code = rec.get('category', 'cs.GEN').strip() or 'cs.GEN'
-
-            if not (title and arxiv_id and pdf_url):
-                print(f"⚠ 跳过 {i}: 缺少必要字段")
-                continue
-            
-            # >>>>>>>>>> 关键：查重 <<<<<<<<<<
             cur.execute("SELECT paper_id FROM papers WHERE arxiv_id = %s", (arxiv_id,))
             if cur.fetchone():
-                skipped_duplicate += 1
-                continue   # 跳过，不插入
+                self.known_arxiv_ids.add(arxiv_id)
+                self.skipped_duplicate += 1
+                return False
 
-            # 获取或创建分类
             category_id = get_or_create_category_id(cur, category_code)
-
-            # 插入论文
             cur.execute("""
                 INSERT INTO papers (title, arxiv_id, doi, category_id, abstract, pdf_url)
                 VALUES (%s, %s, %s, %s, %s, %s)
             """, (title, arxiv_id, doi, category_id, abstract, pdf_url))
             conn.commit()
+            self.known_arxiv_ids.add(arxiv_id)
+            self.category_ids[category_code] = category_id
             paper_id = cur.lastrowid
 
-            # 提取关键词（仅基于本篇摘要）
-            keywords = extract_top_keywords(abstract, top_n=5) if abstract else []
-
             for word in keywords:
-                # 获取或创建 keyword
                 cur.execute("SELECT keyword_id FROM keywords WHERE word = %s", (word,))
-                row = cur.fetchone()
-                if row:
-                    kw_id = row[0]
+                found = cur.fetchone()
+                if found:
+                    kw_id = found[0]
                 else:
                     cur.execute("INSERT INTO keywords (word) VALUES (%s)", (word,))
                     kw_id = cur.lastrowid
                     conn.commit()
-
-                # 关联（防重复）
+                self.keyword_ids[word] = kw_id
                 cur.execute("""
                     INSERT IGNORE INTO paper_keywords (paper_id, keyword_id)
                     VALUES (%s, %s)
                 """, (paper_id, kw_id))
 
             conn.commit()
-            # print(f"✅ [{i}/{len(records)}] '{title[:50]}...' | 分类: {category_code} | 关键词: {len(keywords)}")
-            success += 1
-
-        except Exception as e:
-            # print(f"❌ 记录 {i} 失败 | category='{category_code}' | arxiv_id='{arxiv_id}' | 错误: {e}")
+            return True
+        except Exception:
             conn.rollback()
+            return False
 
-    print(f"\n🎉 导入完成！成功: {success}/{len(records)}")
-    cur.close()
+    def close(self):
+        self.flush()
+        self.save_checkpoint(completed=True)
+        self.cur.close()
+
+
+# ======================
+# 批量装载：TSV + LOAD DATA LOCAL INFILE
+# ======================
+
+# LOAD DATA 默认格式：字段以 \t 分隔、行以 \n 结束、反斜杠转义，\N 表示 NULL
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _tsv_line(values):
+    return '\t'.join('\\N' if v is None else str(v).translate(_TSV_ESCAPES) for v in values) + '\n'
+
+
+class BulkLoader:
+    """
+    首次全量导入的快速路径，与 BatchWriter 接口相同：
+    1. 论文和论文-关键词对先写入本地 TSV 暂存文件；
+    2. LOAD DATA LOCAL INFILE 装入临时暂存表；
+    3. 用 INSERT ... SELECT 整体合并进 papers / keywords / paper_keywords，只提交一次。
+    keywords.total_count 由 triggers.sql 的触发器在合并 paper_keywords 时逐行维护；
+    若库中没有该触发器，则合并后按本次新增的关联一次性补加计数。
+    """
+
+    def __init__(self, conn, staging_dir=None, preload_arxiv_ids=True, **_):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.keep_staging = staging_dir is not None
+        self.staging_dir = staging_dir or tempfile.mkdtemp(prefix='paper_import_')
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.papers_path = os.path.join(self.staging_dir, 'papers.tsv')
+        self.links_path = os.path.join(self.staging_dir, 'paper_keywords.tsv')
+        self.papers_file = open(self.papers_path, 'w', encoding='utf-8', newline='')
+        self.links_file = open(self.links_path, 'w', encoding='utf-8', newline='')
+        self.seen_arxiv_ids = set()
+        self.category_codes = {}
+        self.staged = 0
+        self.links = 0
+        self.success = 0
+        self.skipped_duplicate = 0
+        self.batches = 0
+
+        self.cur.execute("SELECT code, category_id FROM categories")
+        self.category_ids = dict(self.cur.fetchall())
+        if preload_arxiv_ids:
+            self.cur.execute("SELECT arxiv_id FROM papers")
+            self.seen_arxiv_ids = {row[0] for row in self.cur}
+        print(f"📦 预加载: {len(self.seen_arxiv_ids)} 篇论文, {len(self.category_ids)} 个分类")
+
+    def add(self, row, keywords, position=None):
+        title, arxiv_id, doi, category_code, abstract, pdf_url = row
+        if arxiv_id in self.seen_arxiv_ids:
+            self.skipped_duplicate += 1
+            return
+        self.seen_arxiv_ids.add(arxiv_id)
+        self.category_codes.setdefault(category_code, len(self.category_codes))
+        self.staged += 1
+        # seq 保留文件顺序，合并后 paper_id / keyword_id 的分配顺序与逐批导入一致
+        self.papers_file.write(_tsv_line((self.staged, title, arxiv_id, doi, category_code, abstract, pdf_url)))
+        for word in keywords:
+            self.links += 1
+            self.links_file.write(_tsv_line((self.links, arxiv_id, word)))
+
+    def skip(self, position, duplicate=False):
+        if duplicate:
+            self.skipped_duplicate += 1
+
+    def _has_keyword_trigger(self):
+        self.cur.execute("""
+            SELECT COUNT(*) FROM information_schema.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = 'paper_keywords'
+              AND EVENT_MANIPULATION = 'INSERT'
+        """)
+        return self.cur.fetchone()[0] > 0
+
+    def _merge(self):
+        cur = self.cur
+        timings = {}
+
+        def step(name, sql, params=()):
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            timings[name] = time.perf_counter() - started
+            return cur.rowcount
+
+        # 1. 新分类（数量很少，直接多行插入）
+        new_codes = [code for code in self.category_codes if code not in self.category_ids]
+        if new_codes:
+            cur.executemany("INSERT IGNORE INTO categories (code, name) VALUES (%s, %s)",
+                            [(code, ARXIV_CATEGORY_NAMES.get(code, f"Unknown Category: {code}")) for code in new_codes])
+
+        # 2. 暂存表（会话级临时表，连接关闭即消失）
+        cur.execute("""
+            CREATE TEMPORARY TABLE stage_papers (
+                seq INT NOT NULL PRIMARY KEY,
+                title VARCHAR(500) NOT NULL,
+                arxiv_id VARCHAR(50) NOT NULL,
+                doi VARCHAR(100),
+                category_code VARCHAR(50) NOT NULL,
+                abstract TEXT,
+                pdf_url VARCHAR(500) NOT NULL
+            )
+        """)
+        cur.execute("""
+            CREATE TEMPORARY TABLE stage_paper_keywords (
+                pos INT NOT NULL PRIMARY KEY,
+                arxiv_id VARCHAR(50) NOT NULL,
+                word VARCHAR(100) NOT NULL
+            )
+        """)
+        step('load_papers', "LOAD DATA LOCAL INFILE %s INTO TABLE stage_papers CHARACTER SET utf8mb4 "
+                            "(seq, title, arxiv_id, doi, category_code, abstract, pdf_url)", (self.papers_path,))
+        step('load_paper_keywords', "LOAD DATA LOCAL INFILE %s INTO TABLE stage_paper_keywords CHARACTER SET utf8mb4 "
+                                    "(pos, arxiv_id, word)", (self.links_path,))
+        cur.execute("CREATE INDEX idx_stage_pk_arxiv ON stage_paper_keywords (arxiv_id)")
+
+        # 3. 合并：只有 paper_id 大于合并前最大值的才是本次插入的论文
+        cur.execute("SELECT COALESCE(MAX(paper_id), 0) FROM papers")
+        before = cur.fetchone()[0]
+        self.success = step('merge_papers', """
+            INSERT IGNORE INTO papers (title, arxiv_id, doi, category_id, abstract, pdf_url)
+            SELECT s.title, s.arxiv_id, s.doi, c.category_id, s.abstract, s.pdf_url
+            FROM stage_papers s JOIN categories c ON c.code = s.category_code
+            ORDER BY s.seq
+        """)
+        step('merge_keywords', """
+            INSERT IGNORE INTO keywords (word)
+            SELECT s.word
+            FROM stage_paper_keywords s JOIN papers p ON p.arxiv_id = s.arxiv_id
+            WHERE p.paper_id > %s
+            GROUP BY s.word
+            ORDER BY MIN(s.pos)
+        """, (before,))
+        has_trigger = self._has_keyword_trigger()
+        step('merge_paper_keywords', """
+            INSERT IGNORE INTO paper_keywords (paper_id, keyword_id)
+            SELECT p.paper_id, k.keyword_id
+            FROM stage_paper_keywords s
+            JOIN papers p ON p.arxiv_id = s.arxiv_id
+            JOIN keywords k ON k.word = s.word
+            WHERE p.paper_id > %s
+            ORDER BY s.pos
+        """, (before,))
+        if not has_trigger:
+            step('update_counts', """
+                UPDATE keywords SET total_count = total_count + (
+                    SELECT COUNT(*) FROM paper_keywords pk
+                    WHERE pk.keyword_id = keywords.keyword_id AND pk.paper_id > %s
+                )
+                WHERE keyword_id IN (SELECT keyword_id FROM paper_keywords WHERE paper_id > %s)
+            """, (before, before))
+
+        cur.execute("DROP TEMPORARY TABLE stage_papers")
+        cur.execute("DROP TEMPORARY TABLE stage_paper_keywords")
+        return timings
+
+    def close(self):
+        self.papers_file.close()
+        self.links_file.close()
+        print(f"📝 暂存文件: {self.staged} 篇论文, {self.links} 条关键词关联 -> {self.staging_dir}")
+        try:
+            if self.staged:
+                timings = self._merge()
+                self.conn.commit()
+                self.batches = 1
+                print("⏱ 合并耗时: " + ", ".join(f"{name} {t:.2f}s" for name, t in timings.items()))
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cur.close()
+            if not self.keep_staging:
+                shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+# 标记记录处理异常（字段类型错误等），与原逻辑一样按失败处理
+PREPARE_FAILED = 'failed'
+# 增量模式下已确认入库的记录，跳过规范化和关键词提取
+PREPARE_KNOWN = 'known'
+
+# 当前进程使用的关键词模型：None 表示按单篇词频，否则为拟合好的 TfidfModel
+_keyword_model = None
+
+
+def _set_keyword_model(model):
+    global _keyword_model
+    _keyword_model = model
+
+
+def prepare_chunk(chunk):
+    """
+    对一块 (序号, 偏移, 记录) 做规范化和关键词提取；可在进程池中执行
+    返回 [(序号, 偏移, (row, keywords) / None / PREPARE_FAILED / PREPARE_KNOWN)]
+    """
+    prepared = []
+    for i, offset, rec in chunk:
+        if rec == PREPARE_KNOWN:
+            prepared.append([i, offset, PREPARE_KNOWN])
+            continue
+        try:
+            row = normalize_record(rec)
+        except Exception:
+            row = PREPARE_FAILED
+        prepared.append([i, offset, row])
+
+    valid = [item for item in prepared if isinstance(item[2], tuple)]
+    if _keyword_model is None:
+        # 提取关键词（仅基于本篇摘要）
+        keyword_lists = [extract_top_keywords(item[2][4], top_n=5) if item[2][4] else [] for item in valid]
+    else:
+        keyword_lists = _keyword_model.top_keywords([item[2][4] for item in valid], top_n=5)
+    for item, keywords in zip(valid, keyword_lists):
+        item[2] = (item[2], keywords)
+    return [tuple(item) for item in prepared]
+
+
+def _chunked(records, chunk_size):
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ordered_map(fn, chunks, workers, initializer=None, initargs=()):
+    """
+    按原顺序产出 fn(chunk) 的结果
+    workers > 1 时交给进程池；在途块数限制为 workers * 2，
+    流式读取时内存依然有界（Pool.imap 会把输入一次性读完，这里不用它）
+    """
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+
+    with multiprocessing.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.apply_async(fn, (chunk,)))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().get()
+        while in_flight:
+            yield in_flight.popleft().get()
+
+
+def iter_prepared(records, workers=1, chunk_size=500, keyword_model=None):
+    """按原顺序产出 (序号, 偏移, prepare_chunk 结果)，分词可并行"""
+    results = _ordered_map(prepare_chunk, _chunked(records, chunk_size), workers,
+                           initializer=_set_keyword_model, initargs=(keyword_model,))
+    for prepared in results:
+        yield from prepared
+
+
+def _abstracts_of(chunk):
+    abstracts = []
+    for _, _, rec in chunk:
+        try:
+            abstracts.append(rec.get('summary', rec.get('abstract', '')).strip())
+        except Exception:
+            abstracts.append('')
+    return abstracts
+
+
+def _chunk_doc_buckets(args):
+    chunk, size = args
+    return TfidfModel.chunk_doc_buckets(_abstracts_of(chunk), size)
+
+
+def fit_tfidf(json_path, stream=False, workers=1, chunk_size=20000, hash_bits=22, min_df=2):
+    """第一遍：按块统计全语料文档频率；内存只与块大小和 2^hash_bits 有关"""
+    model = TfidfModel(hash_bits=hash_bits, min_df=min_df)
+    records, _ = load_records(json_path, stream=stream)
+    started = time.perf_counter()
+    chunks = ((chunk, model.size) for chunk in _chunked(records, chunk_size))
+    for doc_buckets, n_docs in _ordered_map(_chunk_doc_buckets, chunks, workers):
+        model.add_doc_buckets(doc_buckets, n_docs)
+    print(f"📊 文档频率统计完成: {model.n_docs} 篇摘要，用时 {time.perf_counter() - started:.1f}s")
+    return model.finalize()
+
+
+def process_json(json_path, stream=False, progress_every=10000, batch_size=1000, workers=1,
+                 keyword_mode='freq', tfidf_chunk=20000, checkpoint_path=None, resume=False,
+                 delta=False, bloom_path='arxiv_ids.bloom.npz', bloom_fp=0.001, bulk=False, staging_dir=None):
+    checkpoint = ImportCheckpoint(checkpoint_path or json_path + '.checkpoint.json', json_path, stream=stream)
+    state = checkpoint.load() if resume else None
+    if resume:
+        if state is None:
+            print(f"ℹ 未找到断点 {checkpoint.path}，从头开始导入")
+        elif state.get("completed"):
+            print(f"✅ 断点显示该文件已导入完成（成功 {state['success']} 条），无需续传")
+            return
+        else:
+            print(f"🔁 从断点续传: 第 {state['record_index']} 条之后（字节偏移 {state['offset']}，"
+                  f"已提交 {state['batch_id']} 批）")
+    state = state or {}
+    start_index, start_offset = state.get("record_index", 0), state.get("offset", 0)
+
+    keyword_model = None
+    if keyword_mode == 'tfidf':
+        if state and os.path.exists(checkpoint.idf_path):
+            # 续传时复用第一遍算好的 idf，避免重新扫描全文件
+            keyword_model = TfidfModel()
+            keyword_model.idf = np.load(checkpoint.idf_path)
+            keyword_model.size = len(keyword_model.idf)
+        else:
+            keyword_model = fit_tfidf(json_path, stream=stream, workers=workers, chunk_size=tfidf_chunk)
+            np.save(checkpoint.idf_path, keyword_model.idf)
+
+    records, total = load_records(json_path, stream=stream, start_index=start_index, start_offset=start_offset)
+    progress = ImportProgress(os.path.getsize(json_path), every=progress_every, start_count=start_index)
+
+    conn = get_connection(allow_local_infile=True) if bulk else get_connection()
+    if delta:
+        bloom = sync_bloom(conn, bloom_path, fp_rate=bloom_fp)
+        records = delta_filter(records, bloom, conn)
+    if bulk:
+        writer = BulkLoader(conn, staging_dir=staging_dir, preload_arxiv_ids=not delta)
+    else:
+        writer = BatchWriter(conn, batch_size=batch_size, checkpoint=checkpoint, resume_state=state,
+                             preload_arxiv_ids=not delta)
+
+    processed = start_index
+    # 分词在进程池中并行，写库只在当前进程顺序进行
+    chunk_size = tfidf_chunk if keyword_model is not None else 500
+    for i, offset, prepared in iter_prepared(records, workers=workers, chunk_size=chunk_size,
+                                             keyword_model=keyword_model):
+        processed = i
+        progress.update(i, offset)
+        if prepared == PREPARE_KNOWN:
+            writer.skip((i, offset), duplicate=True)
+            continue
+        if prepared == PREPARE_FAILED:
+            writer.skip((i, offset))
+            continue
+        if prepared is None:
+            print(f"⚠ 跳过 {i}: 缺少必要字段")
+            writer.skip((i, offset))
+            continue
+        writer.add(*prepared, position=(i, offset))
+
+    writer.close()
+    if delta:
+        # 把本次新增的论文补进过滤器，供下一次增量运行使用
+        sync_bloom(conn, bloom_path, fp_rate=bloom_fp)
+    progress.finish(processed)
+    print(f"\n🎉 导入完成！成功: {writer.success}/{total if total is not None else processed}，"
+          f"重复跳过: {writer.skipped_duplicate}，共 {writer.batches} 批")
     conn.close()
 
 
@@ -185,10 +1082,54 @@ def process_json(json_path):
 # 入口
 # ======================
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="导入 papers.json 到 papers / keywords / paper_keywords")
+    parser.add_argument('json_file', nargs='?', default='papers.json',
+                        help="论文数据文件（JSON 数组或 NDJSON），默认当前目录下的 papers.json")
+    parser.add_argument('--stream', action='store_true',
+                        help="流式逐条解析，内存占用与文件大小无关（.ndjson/.jsonl 自动启用）")
+    parser.add_argument('--progress-every', type=int, default=10000,
+                        help="每处理多少条打印一次速度，0 表示不打印")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="每批插入并提交的论文数")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="分词/关键词提取的进程数，>1 时使用 multiprocessing 进程池")
+    parser.add_argument('--keywords', choices=['freq', 'tfidf'], default='freq',
+                        help="关键词提取方式：freq=单篇摘要词频，tfidf=全语料 TF-IDF（需读两遍文件）")
+    parser.add_argument('--tfidf-chunk', type=int, default=20000,
+                        help="TF-IDF 模式下每块处理的摘要数，决定峰值内存")
+    parser.add_argument('--checkpoint', default=None,
+                        help="断点文件路径，默认 <json_file>.checkpoint.json；每提交一批更新一次")
+    parser.add_argument('--resume', action='store_true',
+                        help="从断点继续导入（流式模式直接 seek 到断点处的字节偏移）")
+    parser.add_argument('--delta', action='store_true',
+                        help="增量模式：用持久化的 arxiv_id 布隆过滤器跳过已入库记录，只对可能重复的记录查库")
+    parser.add_argument('--bloom', default='arxiv_ids.bloom.npz',
+                        help="增量模式的布隆过滤器文件，不存在时从 papers 表构建")
+    parser.add_argument('--bloom-fp', type=float, default=0.001,
+                        help="布隆过滤器目标误判率，只在新建/重建时生效")
+    parser.add_argument('--bulk', action='store_true',
+                        help="首次全量导入：先写 TSV 暂存文件，再 LOAD DATA LOCAL INFILE + INSERT ... SELECT 合并"
+                             "（需服务端开启 local_infile）")
+    parser.add_argument('--staging-dir', default=None,
+                        help="--bulk 模式的暂存目录，指定后导入完成不删除，默认使用临时目录")
+    args = parser.parse_args()
+    if args.bulk and args.resume:
+        parser.error("--bulk 只在最后提交一次，不支持 --resume")
+    return args
+
+
 if __name__ == '__main__':
-    json_file = 'papers.json'  # 固定使用当前目录下的 papers.json
+    args = parse_args()
+    json_file = args.json_file
+    stream = args.stream or json_file.endswith(('.ndjson', '.jsonl'))
     try:
-        process_json(json_file)
+        process_json(json_file, stream=stream, progress_every=args.progress_every,
+                     batch_size=args.batch_size, workers=args.workers,
+                     keyword_mode=args.keywords, tfidf_chunk=args.tfidf_chunk,
+                     checkpoint_path=args.checkpoint, resume=args.resume,
+                     delta=args.delta, bloom_path=args.bloom, bloom_fp=args.bloom_fp,
+                     bulk=args.bulk, staging_dir=args.staging_dir)
     except FileNotFoundError:
         print(f"❌ 错误: 找不到文件 '{json_file}'，请确保它在当前目录下。")
         sys.exit(1)
@@ -31,7 +31,7 @@ STUDENT_NAMES = [
     "孔八", "曹九", "严十", "华一", "金二", "魏三", "陶四", "姜五"
 ]  # 可扩展
 
-PASSWORD_HASH = "123456"  # 明文，仅演示用！
+PASSWORD_HASH = "123456"  # 明文，仅演示用！首次登录成功后会自动升级为 scrypt 哈希
 
 def get_connection():
     return mysql.connector.connect(**DB_CONFIG)
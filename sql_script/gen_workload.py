@@ -0,0 +1,274 @@
+# gen_workload.py
+"""
+可扩展的合成负载生成器（用于压测 / 基准）：N 个学院、M 个学生、P 条点击
+- 论文热度服从 Zipf 分布（少数论文占大部分点击），学生活跃度同样偏斜；
+- 点击时间按“天 × 小时”加权：工作日高于周末，白天和晚间有高峰、凌晨低谷；
+- 所有 id 显式生成，点击的 college_id 直接取自学生数组，不再逐条查 users；
+- 点击按时间顺序分块生成（NumPy 数组），每块切成多行 INSERT 分批写入，内存与 P 无关；
+- 点击时间与应用写入的 click_time（datetime.utcnow()）一致，均为 UTC，小时权重也按 UTC 小时计算；
+- 相同参数 + 相同 --seed 生成完全相同的数据（--end 默认取 UTC 今天 0 点，需逐字节复现时请显式指定）。
+
+用法：
+    python sql_script/gen_workload.py --colleges 20 --users 100000 --clicks 100000000
+    python sql_script/gen_workload.py --clicks 1000000 --dry-run      # 只生成不写库，测生成速度
+"""
+import argparse
+import time
+from datetime import datetime
+
+import mysql.connector
+import numpy as np
+
+from db_init_rest import DB_CONFIG, COLLEGES, STUDENT_NAMES, PASSWORD_HASH
+
+# 每小时相对点击量（0 点 ~ 23 点）：上午、下午、晚间三个高峰
+HOURLY_WEIGHTS = np.array([
+    0.6, 0.3, 0.15, 0.1, 0.1, 0.15, 0.4, 1.0, 2.0, 3.2, 3.8, 3.5,
+    2.4, 2.8, 3.6, 3.9, 3.5, 2.6, 2.0, 2.6, 3.4, 3.6, 2.8, 1.5
+])
+WEEKEND_FACTOR = 0.6
+DEFAULT_CATEGORIES = [('cs.AI', 'Artificial Intelligence'), ('cs.LG', 'Machine Learning'),
+                      ('cs.CV', 'Computer Vision and Pattern Recognition'), ('cs.CL', 'Computation and Language')]
+
+
+# ======================
+# 纯数组生成（不访问数据库）
+# ======================
+
+def college_rows(n_colleges):
+    """前 10 个沿用演示数据中的真实学院，其余按编号补齐"""
+    rows = []
+    for i in range(n_colleges):
+        name, code = COLLEGES[i] if i < len(COLLEGES) else (f'学院{i + 1:04d}', f'C{i + 1:04d}')
+        rows.append((i + 1, name, code))
+    return rows
+
+
+def student_colleges(rng, n_students, n_colleges):
+    """学生所属学院（college_id 数组）：各学院规模在 0.5 ~ 1.5 倍之间浮动"""
+    weights = rng.uniform(0.5, 1.5, n_colleges)
+    sizes = rng.multinomial(n_students, weights / weights.sum())
+    return np.repeat(np.arange(1, n_colleges + 1, dtype=np.int32), sizes)
+
+
+def zipf_cdf(n, s):
+    """有限 Zipf 分布的累积概率：第 k 名的权重为 1 / k^s（s 可以 <= 1）"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** s
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def sample_ranked(rng, cdf, ranked_ids, size):
+    """按 cdf 抽样名次，再映射到随机打乱过的 id（热度与 id 大小无关）"""
+    ranks = np.searchsorted(cdf, rng.random(size), side='right')
+    return ranked_ids[np.minimum(ranks, len(ranked_ids) - 1)]
+
+
+def hour_units(days, end):
+    """返回 end 之前 days 天内每个小时的起始时间戳和相对权重"""
+    end_ts = int(np.datetime64(end, 's').astype(np.int64))
+    end_ts -= end_ts % 3600
+    starts = end_ts - 3600 * np.arange(days * 24, 0, -1, dtype=np.int64)
+    hours = (starts // 3600) % 24
+    weekday = (starts // 86400 + 3) % 7        # 1970-01-01 是周四 -> 周一为 0
+    weights = HOURLY_WEIGHTS[hours] * np.where(weekday >= 5, WEEKEND_FACTOR, 1.0)
+    return starts, weights / weights.sum()
+
+
+def iter_click_chunks(seed, n_clicks, user_ids, user_college_ids, paper_ids, days, end,
+                      paper_zipf=1.1, user_zipf=0.8, chunk_size=1000000):
+    """
+    按时间顺序分块生成点击，yield dict(click_id, user_id, paper_id, college_id, click_time)
+    click_time 为 int64 UTC 纪元秒，写库时直接格式化为 DATETIME（与应用的 datetime.utcnow() 一致）
+    """
+    rng = np.random.default_rng(seed)
+    paper_ranked = rng.permutation(np.asarray(paper_ids, dtype=np.int32))
+    paper_cdf = zipf_cdf(len(paper_ranked), paper_zipf)
+    user_order = rng.permutation(len(user_ids))
+    user_ranked = np.asarray(user_ids, dtype=np.int32)[user_order]
+    college_ranked = np.asarray(user_college_ids, dtype=np.int32)[user_order]
+    user_cdf = zipf_cdf(len(user_ranked), user_zipf)
+
+    starts, weights = hour_units(days, end)
+    per_hour = rng.multinomial(n_clicks, weights)
+
+    next_id = 1
+    unit = 0
+    while unit < len(starts):
+        # 连续若干小时凑成一块，块内数量不超过 chunk_size（单个小时超出时整小时成块）
+        end_unit = unit + 1
+        total = per_hour[unit]
+        while end_unit < len(starts) and total + per_hour[end_unit] <= chunk_size:
+            total += per_hour[end_unit]
+            end_unit += 1
+        if total:
+            click_time = np.repeat(starts[unit:end_unit], per_hour[unit:end_unit])
+            click_time += rng.integers(0, 3600, total)
+            click_time.sort()
+            user_rank = np.searchsorted(user_cdf, rng.random(total), side='right')
+            user_rank = np.minimum(user_rank, len(user_ranked) - 1)
+            yield {
+                "click_id": np.arange(next_id, next_id + total, dtype=np.int64),
+                "user_id": user_ranked[user_rank],
+                "paper_id": sample_ranked(rng, paper_cdf, paper_ranked, total),
+                "college_id": college_ranked[user_rank],
+                "click_time": click_time,
+            }
+            next_id += total
+        unit = end_unit
+
+
+def format_times(epoch_seconds):
+    """int64 时间戳 -> 'YYYY-MM-DD HH:MM:SS' 字符串数组"""
+    return np.char.replace(epoch_seconds.astype('datetime64[s]').astype(str), 'T', ' ')
+
+
+# ======================
+# 写库
+# ======================
+
+def insert_rows(conn, cur, sql, columns, batch_size):
+    """columns 为等长数组/列表，按 batch_size 切片后 executemany，每批提交一次"""
+    total = len(columns[0])
+    for start in range(0, total, batch_size):
+        cur.executemany(sql, list(zip(*(col[start:start + batch_size] for col in columns))))
+        conn.commit()
+    return total
+
+
+def reset_tables(cur):
+    print("🧹 清空 paper_clicks / users / colleges ...")
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cur.execute("TRUNCATE TABLE paper_clicks")
+    cur.execute("TRUNCATE TABLE users")
+    cur.execute("TRUNCATE TABLE colleges")
+    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+def load_or_create_papers(conn, cur, n_papers, batch_size):
+    """沿用已导入的论文；papers 表为空时生成 n_papers 篇占位论文"""
+    cur.execute("SELECT paper_id FROM papers")
+    paper_ids = np.fromiter((row[0] for row in cur), dtype=np.int32)
+    if len(paper_ids):
+        print(f"📚 使用现有论文 {len(paper_ids)} 篇")
+        return paper_ids
+
+    print(f"📚 papers 表为空，生成 {n_papers} 篇占位论文...")
+    cur.execute("SELECT category_id FROM categories")
+    category_ids = [row[0] for row in cur.fetchall()]
+    if not category_ids:
+        cur.executemany("INSERT INTO categories (code, name) VALUES (%s, %s)", DEFAULT_CATEGORIES)
+        conn.commit()
+        cur.execute("SELECT category_id FROM categories")
+        category_ids = [row[0] for row in cur.fetchall()]
+    paper_ids = np.arange(1, n_papers + 1, dtype=np.int32)
+    insert_rows(conn, cur, """
+        INSERT INTO papers (paper_id, title, arxiv_id, category_id, abstract, pdf_url)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [
+        paper_ids.tolist(),
+        [f"Synthetic Paper {i}" for i in paper_ids.tolist()],
+        [f"synthetic.{i:08d}" for i in paper_ids.tolist()],
+        [category_ids[i % len(category_ids)] for i in paper_ids.tolist()],
+        [""] * n_papers,
+        [f"https://example.org/synthetic/{i}.pdf" for i in paper_ids.tolist()],
+    ], batch_size)
+    return paper_ids
+
+
+def insert_users(conn, cur, colleges, college_of_student, batch_size):
+    """1 个校级管理员 + 每学院 1 个院级管理员 + 学生；返回学生 user_id 数组"""
+    rows = [(1, 'admin_uni', PASSWORD_HASH, '张校长', 'UNIVERSITY_ADMIN', colleges[0][0])]
+    for college_id, _, code in colleges:
+        rows.append((len(rows) + 1, f'admin_{code.lower()}', PASSWORD_HASH, f'{code}院长', 'COLLEGE_ADMIN', college_id))
+    insert_rows(conn, cur, """
+        INSERT INTO users (user_id, username, password_hash, real_name, role, college_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, list(zip(*rows)), batch_size)
+
+    first_id = len(rows) + 1
+    student_ids = np.arange(first_id, first_id + len(college_of_student), dtype=np.int32)
+    codes = {college_id: code.lower() for college_id, _, code in colleges}
+    seq = student_ids - first_id
+    usernames = [f"stu_{codes[c]}_{n:07d}" for c, n in zip(college_of_student.tolist(), seq.tolist())]
+    real_names = [f"{STUDENT_NAMES[n % len(STUDENT_NAMES)]}({n + 1})" for n in seq.tolist()]
+    insert_rows(conn, cur, """
+        INSERT INTO users (user_id, username, password_hash, real_name, role, college_id)
+        VALUES (%s, %s, %s, %s, 'STUDENT', %s)
+    """, [student_ids.tolist(), usernames, [PASSWORD_HASH] * len(student_ids), real_names,
+          college_of_student.tolist()], batch_size)
+    return student_ids
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="生成大规模合成学院 / 用户 / 点击数据")
+    parser.add_argument('--colleges', type=int, default=10)
+    parser.add_argument('--users', type=int, default=10000, help="学生数（另含 1 + 学院数 个管理员）")
+    parser.add_argument('--clicks', type=int, default=1000000)
+    parser.add_argument('--papers', type=int, default=10000, help="papers 表为空时生成的占位论文数")
+    parser.add_argument('--days', type=int, default=30, help="点击分布在 --end 之前多少天内")
+    parser.add_argument('--end', default=None, help="点击时间上界（UTC），如 2024-06-01T00:00:00；默认 UTC 今天 0 点")
+    parser.add_argument('--paper-zipf', type=float, default=1.1, help="论文热度 Zipf 指数，越大越集中")
+    parser.add_argument('--user-zipf', type=float, default=0.8, help="学生活跃度 Zipf 指数")
+    parser.add_argument('--chunk-size', type=int, default=1000000, help="每次在内存中生成的点击数")
+    parser.add_argument('--batch-size', type=int, default=20000, help="每条多行 INSERT 的行数")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help="只生成数组，不连接数据库")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    end = args.end or datetime.utcnow().strftime('%Y-%m-%dT00:00:00')
+    rng = np.random.default_rng(args.seed)
+    colleges = college_rows(args.colleges)
+    college_of_student = student_colleges(rng, args.users, args.colleges)
+    print(f"🔧 seed={args.seed} 学院={args.colleges} 学生={args.users} 点击={args.clicks} "
+          f"时间范围={args.days} 天（截至 {end}）")
+
+    conn = cur = None
+    if args.dry_run:
+        paper_ids = np.arange(1, args.papers + 1, dtype=np.int32)
+        student_ids = np.arange(args.colleges + 2, args.colleges + 2 + args.users, dtype=np.int32)
+    else:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cur = conn.cursor()
+        reset_tables(cur)
+        paper_ids = load_or_create_papers(conn, cur, args.papers, args.batch_size)
+        insert_rows(conn, cur, "INSERT INTO colleges (college_id, college_name, code) VALUES (%s, %s, %s)",
+                    list(zip(*colleges)), args.batch_size)
+        student_ids = insert_users(conn, cur, colleges, college_of_student, args.batch_size)
+        print(f"👥 已插入 {len(colleges)} 个学院, {len(student_ids) + len(colleges) + 1} 个用户")
+        # 所有 id 都由本脚本生成且一定有效，写点击时关闭外键检查以加速
+        cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+    started = time.perf_counter()
+    written = 0
+    paper_hits = np.zeros(int(paper_ids.max()) + 1, dtype=np.int64)
+    try:
+        for chunk in iter_click_chunks(args.seed, args.clicks, student_ids, college_of_student, paper_ids,
+                                       args.days, end, args.paper_zipf, args.user_zipf, args.chunk_size):
+            paper_hits += np.bincount(chunk["paper_id"], minlength=len(paper_hits))
+            if not args.dry_run:
+                insert_rows(conn, cur, """
+                    INSERT INTO paper_clicks (click_id, user_id, paper_id, college_id, click_time)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, [chunk["click_id"].tolist(), chunk["user_id"].tolist(), chunk["paper_id"].tolist(),
+                      chunk["college_id"].tolist(), format_times(chunk["click_time"]).tolist()], args.batch_size)
+            written += len(chunk["click_id"])
+            elapsed = time.perf_counter() - started
+            print(f"  🖱️ {written}/{args.clicks} 条点击，{written / max(elapsed, 1e-9):.0f} 条/秒")
+    finally:
+        if cur is not None:
+            cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+            cur.close()
+            conn.close()
+
+    top = np.sort(paper_hits)[::-1]
+    top_share = top[:max(1, len(paper_ids) // 100)].sum() / max(written, 1)
+    print(f"\n🎉 完成！点击 {written} 条，用时 {time.perf_counter() - started:.1f}s；"
+          f"最热 1% 论文占点击 {top_share:.1%}")
+
+
+if __name__ == "__main__":
+    main()
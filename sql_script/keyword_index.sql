@@ -0,0 +1,8 @@
+-- =============================================
+-- 文件: keyword_index.sql
+-- 作用: 为已有数据库的 keywords 表增加 total_count 索引（词云全局榜按它排序，新库直接使用 create.sql 即可）
+-- =============================================
+USE paper_sys;
+
+ALTER TABLE keywords
+    ADD INDEX idx_total_count (total_count);
@@ -0,0 +1,13 @@
+-- =============================================
+-- 文件: soft_delete.sql
+-- 作用: 为已有数据库的 users / papers 表增加软删除列（新库直接使用 create.sql 即可）
+-- =============================================
+USE paper_sys;
+
+ALTER TABLE users
+    ADD COLUMN deleted_at DATETIME NULL,
+    ADD INDEX idx_deleted_at (deleted_at);
+
+ALTER TABLE papers
+    ADD COLUMN deleted_at DATETIME NULL,
+    ADD INDEX idx_deleted_at (deleted_at);
@@ -4,7 +4,8 @@ from .repositories import (
     get_student_click_history,
     delete_click_record,
     get_paper_category_stats,
-    get_paper_year_stats
+    get_paper_year_stats,
+    get_top_keywords
 )
 
 blueprint = Blueprint("student", __name__, url_prefix="/student")
@@ -117,4 +118,24 @@ def get_year_stats():
         return jsonify({
             "code": 500,
             "message": f"获取年份统计失败: {str(e)}"
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@blueprint.route("/api/stats/keywords", methods=["GET"])
+def get_keyword_stats():
+    """获取词云关键词排行（top 默认 200，可按 category_id 筛选）"""
+    try:
+        top = request.args.get('top', 200, type=int)
+        category_id = request.args.get('category_id', type=int)
+        stats = get_top_keywords(top=top, category_id=category_id)
+        return jsonify({
+            "code": 200,
+            "message": "获取关键词统计成功",
+            "data": stats
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"获取关键词统计失败: {e}")
+        return jsonify({
+            "code": 500,
+            "message": f"获取关键词统计失败: {str(e)}"
+        }), 500
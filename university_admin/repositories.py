@@ -1,12 +1,28 @@
 # university_admin/repositories.py
 from user.models import db, User, Role, College, PaperClick, Paper, Category
 from datetime import datetime, date
-from sqlalchemy import func, distinct, and_, or_
+from sqlalchemy import func, distinct, and_, or_, type_coerce, Integer
 import logging
+import time
+
+import numpy as np
+
+from common.paper_stats import paper_histogram, get_paper_category_stats, get_paper_year_stats
+from common.keyword_stats import keyword_cloud
+from common.click_analytics import click_snapshot, click_epoch_column, snapshot_enabled
+from common.db_routing import read_only
+from common.auth_token import revoke_user
+from common.reference_data import reference_data
+from common.soft_delete import soft_delete
+from common.timeseries import (
+    GRANULARITY_SECONDS, DEFAULT_BUCKETS, to_epoch, from_epoch,
+    floor_to_bucket, bucket_edges, bucket_counts, format_edges
+)
 
 logger = logging.getLogger(__name__)
 
 # ========== 用户管理相关函数 ==========
+@read_only
 def get_all_users(page=1, per_page=20, search='', role=None, college_id=None):
     """获取所有用户（支持分页、搜索、角色筛选、学院筛选）"""
     try:
@@ -60,7 +76,7 @@ def update_user(user_id, username=None, real_name=None, password=None, role=None
         
         # 检查用户名是否重复
         if username and username != user.username:
-            existing_user = User.query.filter_by(username=username).first()
+            existing_user = User.query.execution_options(include_deleted=True).filter_by(username=username).first()
             if existing_user and existing_user.user_id != user_id:
                 return False, "用户名已存在"
         
@@ -78,12 +94,14 @@ def update_user(user_id, username=None, real_name=None, password=None, role=None
             user.role = Role[role]
         if college_id is not None:
             # 检查学院是否存在
-            college = College.query.get(college_id)
-            if not college:
+            if reference_data.college(college_id) is None:
                 return False, "学院不存在"
             user.college_id = college_id
         
         db.session.commit()
+        # 令牌里带着角色和学院，变更后让旧令牌失效
+        if password is not None or role is not None or college_id is not None:
+            revoke_user(user_id)
         return True, None
     except Exception as e:
         logger.error(f"更新用户信息失败: {e}")
@@ -97,12 +115,10 @@ def delete_user(user_id):
         if not user:
             return False, "用户不存在"
         
-        # 删除用户的浏览记录
-        PaperClick.query.filter_by(user_id=user_id).delete()
-        
-        # 删除用户
-        db.session.delete(user)
-        db.session.commit()
+        # 软删除：浏览记录和用户本身由后台任务分块清理
+        soft_delete(user)
+        revoke_user(user_id)
+        click_snapshot.drop_rows("user_id", [user_id])
         return True, None
     except Exception as e:
         logger.error(f"删除用户失败: {e}")
@@ -110,18 +126,33 @@ def delete_user(user_id):
         return False, f"删除用户失败: {str(e)}"
 
 # ========== 学院点击量统计 ==========
+@read_only
 def get_college_click_stats():
     """统计每个学院的总点击量并排行"""
     try:
+        if snapshot_enabled():
+            clicks = {
+                item["college_id"]: item["clicks"]
+                for item in click_snapshot.aggregate(group_by=("college_id",))
+            }
+            ranking = [
+                {
+                    "college_id": college["college_id"],
+                    "college_name": college["college_name"],
+                    "total_clicks": clicks.get(college["college_id"], 0)
+                }
+                for college in reference_data.colleges()
+            ]
+            ranking.sort(key=lambda item: item["total_clicks"], reverse=True)
+            return ranking
+
         # 统计每个学院的总点击量
         college_stats = db.session.query(
             College.college_id,
             College.college_name,
             func.count(PaperClick.click_id).label('total_clicks')
         ).outerjoin(
-            User, College.college_id == User.college_id
-        ).outerjoin(
-            PaperClick, User.user_id == PaperClick.user_id
+            PaperClick, College.college_id == PaperClick.college_id
         ).group_by(
             College.college_id,
             College.college_name
@@ -145,6 +176,7 @@ def get_college_click_stats():
         raise e
 
 # ========== 复用 college_admin 的函数 ==========
+@read_only
 def get_student_click_history(user_id):
     """获取学生的论文浏览记录"""
     return PaperClick.query.filter_by(user_id=user_id).order_by(PaperClick.click_time.desc()).all()
@@ -155,9 +187,11 @@ def delete_click_record(click_id, user_id):
     if click:
         db.session.delete(click)
         db.session.commit()
+        click_snapshot.drop_rows("click_id", [click_id])
         return True
     return False
 
+@read_only
 def get_papers(page=1, per_page=20, search='', category_id=None):
     """获取论文列表（支持分页、搜索、筛选）"""
     try:
@@ -184,7 +218,7 @@ def get_papers(page=1, per_page=20, search='', category_id=None):
             func.date(Paper.created_at) == today
         ).count()
         
-        category_count = Category.query.count()
+        category_count = len(reference_data.categories())
         
         today_clicks = PaperClick.query.filter(
             func.date(PaperClick.click_time) == today
@@ -230,13 +264,13 @@ def create_paper(title, arxiv_id, category_id, pdf_url, doi=None, abstract=None)
     """创建新论文"""
     try:
         # 检查arXiv ID是否已存在
-        existing_paper = Paper.query.filter_by(arxiv_id=arxiv_id).first()
+        # 已软删除但尚未清理的论文仍占用 arXiv ID
+        existing_paper = Paper.query.execution_options(include_deleted=True).filter_by(arxiv_id=arxiv_id).first()
         if existing_paper:
             return None, "arXiv ID已存在"
         
         # 检查分类是否存在
-        category = Category.query.get(category_id)
-        if not category:
+        if reference_data.category(category_id) is None:
             return None, "分类不存在"
         
         # 创建新论文
@@ -251,6 +285,7 @@ def create_paper(title, arxiv_id, category_id, pdf_url, doi=None, abstract=None)
         
         db.session.add(new_paper)
         db.session.commit()
+        paper_histogram.on_paper_created(new_paper.category_id, new_paper.created_at)
         return new_paper, None
     except Exception as e:
         logger.error(f"创建论文失败: {e}")
@@ -266,16 +301,17 @@ def update_paper(paper_id, **kwargs):
         
         # 检查arXiv ID是否重复
         if 'arxiv_id' in kwargs and kwargs['arxiv_id'] != paper.arxiv_id:
-            existing_paper = Paper.query.filter_by(arxiv_id=kwargs['arxiv_id']).first()
+            existing_paper = Paper.query.execution_options(include_deleted=True).filter_by(arxiv_id=kwargs['arxiv_id']).first()
             if existing_paper and existing_paper.paper_id != paper_id:
                 return False, "arXiv ID已存在"
         
         # 检查分类是否存在
         if 'category_id' in kwargs:
-            category = Category.query.get(kwargs['category_id'])
-            if not category:
+            if reference_data.category(kwargs['category_id']) is None:
                 return False, "分类不存在"
         
+        old_category_id, old_created_at = paper.category_id, paper.created_at
+
         # 更新字段
         for key, value in kwargs.items():
             if hasattr(paper, key) and value is not None:
@@ -283,6 +319,11 @@ def update_paper(paper_id, **kwargs):
         
         paper.updated_at = datetime.utcnow()
         db.session.commit()
+        paper_histogram.on_paper_updated(old_category_id, old_created_at, paper.category_id, paper.created_at)
+        if paper.category_id != old_category_id:
+            click_snapshot.reassign("paper_id", paper_id, "category_id", paper.category_id)
+            # 分类榜按 papers.category_id 聚合，keywords 指纹不会因换分类而变化
+            keyword_cloud.invalidate()
         return True, None
     except Exception as e:
         logger.error(f"更新论文失败: {e}")
@@ -296,12 +337,13 @@ def delete_paper(paper_id):
         if not paper:
             return False
         
-        # 删除相关的浏览记录
-        PaperClick.query.filter_by(paper_id=paper_id).delete()
-        
-        # 删除论文
-        db.session.delete(paper)
-        db.session.commit()
+        category_id, created_at = paper.category_id, paper.created_at
+
+        # 软删除：浏览记录和论文本身由后台任务分块清理
+        soft_delete(paper)
+        paper_histogram.on_paper_deleted(category_id, created_at)
+        keyword_cloud.invalidate()
+        click_snapshot.drop_rows("paper_id", [paper_id])
         return True
     except Exception as e:
         logger.error(f"删除论文失败: {e}")
@@ -309,42 +351,14 @@ def delete_paper(paper_id):
         return False
 
 def get_all_categories():
-    """获取所有分类"""
-    return Category.query.all()
+    """获取所有分类（参考数据缓存中的字典列表）"""
+    return reference_data.categories()
 
 def get_all_colleges():
-    """获取所有学院"""
-    return College.query.all()
-
-def get_paper_category_stats():
-    """获取论文分类统计数据（适配前端图表格式）"""
-    result = db.session.query(
-        Category.name,
-        func.count(Paper.paper_id).label('count')
-    ).join(Paper, Category.category_id == Paper.category_id
-           ).group_by(Category.category_id).all()
-
-    categories = [item.name for item in result]
-    counts = [item.count for item in result]
-    return {
-        "categories": categories,
-        "counts": counts
-    }
-
-def get_paper_year_stats():
-    """获取论文年份分布统计（适配MySQL）"""
-    result = db.session.query(
-        func.YEAR(Paper.created_at).label('year'),
-        func.count(Paper.paper_id).label('count')
-    ).group_by('year').order_by('year').all()
-
-    years = [int(item.year) for item in result]
-    counts = [item.count for item in result]
-    return {
-        "years": years,
-        "counts": counts
-    }
+    """获取所有学院（参考数据缓存中的字典列表）"""
+    return reference_data.colleges()
 
+@read_only
 def get_click_stats_by_college(college_id):
     """获取某学院学生的论文点击次数排行"""
     try:
@@ -385,3 +399,87 @@ def get_click_stats_by_college(college_id):
         logger.error(f"统计学院[{college_id}]学生点击数据失败: {str(e)}")
         raise Exception(f"统计点击数据失败：{str(e)}")
 
+# ========== 点击时间序列 ==========
+def load_click_counts(edges, granularity, college_id=None):
+    """
+    关闭点击快照（CLICK_SNAPSHOT_ENABLED=false）时的降级路径：在数据库里按桶 GROUP BY，
+    只取回每个桶的计数（至多 MAX_BUCKETS 行），不把 click_time 逐行拉到 Python。
+    数据库仍要扫描范围内的全部点击（走 idx_click_time / idx_college_time），耗时随点击数线性增长，
+    千万级点击时为秒级，不在快照路径的 100ms 预算之内。
+    """
+    step = GRANULARITY_SECONDS[granularity]
+    first = int(edges[0])
+    bucket = ((type_coerce(click_epoch_column(), Integer) - first) // step).label("bucket")
+    query = db.session.query(bucket, func.count(PaperClick.click_id)
+                             ).join(Paper, Paper.paper_id == PaperClick.paper_id
+                                    ).join(User, User.user_id == PaperClick.user_id
+                                           ).filter(PaperClick.click_time >= from_epoch(first),
+                                                    PaperClick.click_time < from_epoch(int(edges[-1]) + step),
+                                                    Paper.deleted_at.is_(None),
+                                                    User.deleted_at.is_(None))
+    if college_id:
+        query = query.filter(PaperClick.college_id == college_id)
+    rows = np.array(query.group_by(bucket).all(), dtype=np.int64).reshape(-1, 2)
+
+    counts = np.zeros(len(edges), dtype=np.int64)
+    in_range = (rows[:, 0] >= 0) & (rows[:, 0] < len(edges))
+    counts[rows[in_range, 0]] = rows[in_range, 1]
+    return counts
+
+@read_only
+def get_click_timeseries(granularity='day', college_id=None, start=None, end=None):
+    """
+    按小时/天/周统计点击量（UTC），缺失的桶补 0
+    start/end 为 naive UTC datetime，未给出时取最近 DEFAULT_BUCKETS 个桶
+    """
+    if granularity not in GRANULARITY_SECONDS:
+        raise ValueError(f"不支持的粒度: {granularity}")
+
+    step = GRANULARITY_SECONDS[granularity]
+    end_ts = to_epoch(end) if end else floor_to_bucket(to_epoch(datetime.utcnow()), granularity) + step
+    start_ts = to_epoch(start) if start else end_ts - DEFAULT_BUCKETS[granularity] * step
+    if start_ts >= end_ts:
+        raise ValueError("起始时间必须早于结束时间")
+
+    edges = bucket_edges(start_ts, end_ts, granularity)
+    started = time.perf_counter()
+    if snapshot_enabled():
+        timestamps = click_snapshot.timestamps(
+            filters={"college_id": college_id} if college_id else None,
+            start=int(edges[0]),
+            end=int(edges[-1]) + step
+        )
+        fetched = time.perf_counter()
+        counts = bucket_counts(timestamps, edges, granularity)
+        logger.debug(
+            f"点击时间序列: {len(timestamps)} 条, 取数 {(fetched - started) * 1000:.1f}ms, "
+            f"分桶 {(time.perf_counter() - fetched) * 1000:.1f}ms"
+        )
+    else:
+        counts = load_click_counts(edges, granularity, college_id)
+        logger.debug(f"点击时间序列（数据库分组）: 用时 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    return {
+        "granularity": granularity,
+        "college_id": college_id,
+        "buckets": format_edges(edges),
+        "counts": counts.tolist(),
+        "total": int(counts.sum())
+    }
+
+@read_only
+def get_click_breakdown(group_by, filters=None, start=None, end=None, top=None):
+    """
+    基于点击快照的即席分组统计，例如 学院 × 分类 × 周
+    group_by: college_id/category_id/paper_id/user_id/hour/day/week 的组合
+    """
+    return {
+        "group_by": list(group_by),
+        "rows": click_snapshot.aggregate(
+            group_by=group_by,
+            filters=filters,
+            start=to_epoch(start) if start else None,
+            end=to_epoch(end) if end else None,
+            top=top
+        )
+    }
@@ -17,11 +17,25 @@ from .repositories import (
     get_all_colleges,
     get_paper_category_stats,
     get_paper_year_stats,
-    get_click_stats_by_college
+    get_click_stats_by_college,
+    get_click_timeseries,
+    get_click_breakdown
 )
+from common.db_pool import pool_monitor
+from common.soft_delete import purge_jobs, job_id_for
+from common.reference_data import reference_data, conditional_response
+from common.auth_token import identity_error
+from user.models import Role
+from datetime import datetime, timezone
 
 blueprint = Blueprint("university_admin", __name__, url_prefix="/university_admin")
 
+
+@blueprint.before_request
+def require_university_admin():
+    """整个蓝图要求大学管理员令牌（只校验签名，不查数据库）"""
+    return identity_error((Role.UNIVERSITY_ADMIN,))
+
 # ========== 浏览记录相关API ==========
 @blueprint.route("/api/click-history", methods=["GET"])
 def get_click_history():
@@ -228,9 +242,11 @@ def delete_user_by_id(user_id):
             }), 400
         
         if success:
+            job = purge_jobs.get(job_id_for("user", user_id))
             return jsonify({
                 "code": 200,
-                "message": "用户删除成功"
+                "message": "用户删除成功",
+                "data": {"purge_job": job.to_dict() if job else None}
             }), 200
         return jsonify({
             "code": 404,
@@ -370,9 +386,11 @@ def delete_paper_by_id(paper_id):
         
         success = delete_paper(paper_id)
         if success:
+            job = purge_jobs.get(job_id_for("paper", paper_id))
             return jsonify({
                 "code": 200,
-                "message": "论文删除成功"
+                "message": "论文删除成功",
+                "data": {"purge_job": job.to_dict() if job else None}
             }), 200
         return jsonify({
             "code": 500,
@@ -391,11 +409,12 @@ def get_categories_list():
     """获取所有分类"""
     try:
         categories = get_all_categories()
-        return jsonify({
+        response = jsonify({
             "code": 200,
             "message": "获取分类成功",
-            "data": [category.to_dict() for category in categories]
-        }), 200
+            "data": categories
+        })
+        return conditional_response(response, reference_data.snapshot().category_etag)
     except Exception as e:
         current_app.logger.error(f"获取分类失败: {e}")
         return jsonify({
@@ -408,11 +427,12 @@ def get_colleges_list():
     """获取所有学院"""
     try:
         colleges = get_all_colleges()
-        return jsonify({
+        response = jsonify({
             "code": 200,
             "message": "获取学院列表成功",
-            "data": [college.to_dict() for college in colleges]
-        }), 200
+            "data": colleges
+        })
+        return conditional_response(response, reference_data.snapshot().college_etag)
     except Exception as e:
         current_app.logger.error(f"获取学院列表失败: {e}")
         return jsonify({
@@ -489,3 +509,134 @@ def get_click_stats(college_id):
             "message": f"获取点击统计失败: {str(e)}"
         }), 500
 
+@blueprint.route("/api/stats/db-pool", methods=["GET"])
+def get_db_pool_stats():
+    """获取数据库连接池指标（取连接等待时间、在用连接数等）"""
+    try:
+        stats = pool_monitor.snapshot()
+        stats["wait_p50_ms"] = pool_monitor.wait_percentile(0.5)
+        stats["wait_p99_ms"] = pool_monitor.wait_percentile(0.99)
+        return jsonify({
+            "code": 200,
+            "message": "获取连接池指标成功",
+            "data": stats
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"获取连接池指标失败: {e}")
+        return jsonify({
+            "code": 500,
+            "message": f"获取连接池指标失败: {str(e)}"
+        }), 500
+
+@blueprint.route("/api/purge-jobs", methods=["GET"])
+def get_purge_jobs():
+    """获取最近的删除清理任务及进度"""
+    try:
+        return jsonify({
+            "code": 200,
+            "message": "获取清理任务成功",
+            "data": [job.to_dict() for job in purge_jobs.recent()]
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"获取清理任务失败: {e}")
+        return jsonify({
+            "code": 500,
+            "message": f"获取清理任务失败: {str(e)}"
+        }), 500
+
+@blueprint.route("/api/purge-jobs/<job_id>", methods=["GET"])
+def get_purge_job(job_id):
+    """获取单个删除清理任务的进度"""
+    job = purge_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "code": 404,
+            "message": "清理任务不存在或已过期"
+        }), 404
+    return jsonify({
+        "code": 200,
+        "message": "获取清理任务成功",
+        "data": job.to_dict()
+    }), 200
+
+def _parse_utc_datetime(value):
+    """解析 ISO 日期/时间参数，统一转为 naive UTC"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@blueprint.route("/api/stats/clicks-timeseries", methods=["GET"])
+def get_clicks_timeseries():
+    """获取点击量时间序列（granularity=hour|day|week，可选 college_id/from/to）"""
+    try:
+        granularity = request.args.get('granularity', 'day').strip().lower()
+        college_id = request.args.get('college_id', type=int)
+        try:
+            start = _parse_utc_datetime(request.args.get('from', '').strip())
+            end = _parse_utc_datetime(request.args.get('to', '').strip())
+            stats = get_click_timeseries(
+                granularity=granularity,
+                college_id=college_id,
+                start=start,
+                end=end
+            )
+        except ValueError as e:
+            return jsonify({
+                "code": 400,
+                "message": f"参数错误: {str(e)}"
+            }), 400
+
+        return jsonify({
+            "code": 200,
+            "message": "获取点击时间序列成功",
+            "data": stats
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"获取点击时间序列失败: {e}")
+        return jsonify({
+            "code": 500,
+            "message": f"获取点击时间序列失败: {str(e)}"
+        }), 500
+
+@blueprint.route("/api/stats/clicks-breakdown", methods=["GET"])
+def get_clicks_breakdown():
+    """
+    点击即席统计
+    group_by: 逗号分隔，如 college_id,category_id,week
+    过滤：college_id、category_id、paper_id、user_id、from、to；top 限制返回行数
+    """
+    try:
+        group_by = [
+            item.strip() for item in request.args.get('group_by', 'college_id').split(',')
+            if item.strip()
+        ]
+        filters = {}
+        for name in ('college_id', 'category_id', 'paper_id', 'user_id'):
+            value = request.args.get(name, type=int)
+            if value is not None:
+                filters[name] = value
+        top = request.args.get('top', type=int)
+        try:
+            start = _parse_utc_datetime(request.args.get('from', '').strip())
+            end = _parse_utc_datetime(request.args.get('to', '').strip())
+            stats = get_click_breakdown(group_by, filters=filters, start=start, end=end, top=top)
+        except ValueError as e:
+            return jsonify({
+                "code": 400,
+                "message": f"参数错误: {str(e)}"
+            }), 400
+
+        return jsonify({
+            "code": 200,
+            "message": "获取点击统计成功",
+            "data": stats
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"获取点击即席统计失败: {e}")
+        return jsonify({
+            "code": 500,
+            "message": f"获取点击即席统计失败: {str(e)}"
+        }), 500
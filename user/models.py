@@ -1,10 +1,30 @@
 # user/models.py
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import check_password_hash, generate_password_hash
 import enum
 from flask_login import UserMixin
 from datetime import datetime
-db = SQLAlchemy()
+from common.db_routing import RoutingSession
+from common.password_hashing import password_hasher
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def _cached_college(obj):
+    """学院优先取参考数据缓存，缓存里没有再走关系加载"""
+    from common.reference_data import reference_data
+    cached = reference_data.college(obj.college_id)
+    if cached is None and obj.college:
+        return obj.college.to_dict()
+    return cached
+
+
+def _cached_category(obj):
+    from common.reference_data import reference_data
+    cached = reference_data.category(obj.category_id)
+    if cached is None and obj.category:
+        return obj.category.to_dict()
+    return cached
+
 
 class Role(str, enum.Enum):
     UNIVERSITY_ADMIN = "UNIVERSITY_ADMIN"
@@ -28,7 +48,27 @@ class College(db.Model):
     def __repr__(self):
         return f"<College(name='{self.college_name}', code='{self.code}')>"
 
-class User(db.Model , UserMixin):
+class SoftDeleteMixin:
+    """软删除：deleted_at 非空的行对 ORM 查询不可见，由后台任务清理点击记录后再物理删除"""
+    deleted_at = db.Column(db.DateTime, index=True)
+
+    @property
+    def is_deleted(self):
+        return self.deleted_at is not None
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _hide_soft_deleted(execute_state):
+    # 关系懒加载 / 过期属性刷新不过滤：待清理的点击记录仍能取到所属论文，刚删除的对象仍可读取属性
+    if (execute_state.is_select and not execute_state.is_column_load
+            and not execute_state.is_relationship_load
+            and not execute_state.execution_options.get("include_deleted", False)):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+class User(db.Model , UserMixin, SoftDeleteMixin):
     __tablename__ = 'users'
 
     user_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -43,12 +83,15 @@ class User(db.Model , UserMixin):
     college = db.relationship("College", backref="users")
 
     def set_password(self, password):
-        # self.password_hash = generate_password_hash(password)
-        self.password_hash = password
+        # 哈希在独立进程池中计算，见 common/password_hashing.py
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        # return check_password_hash(self.password_hash, password)
-        return self.password_hash == password
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """旧的明文密码或哈希成本参数已变更"""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -58,7 +101,7 @@ class User(db.Model , UserMixin):
             "role": self.role.value,
             "college_id": self.college_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
-            "college": self.college.to_dict() if self.college else None
+            "college": _cached_college(self)
         }
 
 class UserTask(db.Model):
@@ -109,7 +152,8 @@ class Category(db.Model):
 class PaperClick(db.Model):
     __tablename__ = 'paper_clicks'
     
-    click_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # SQLite 只有 INTEGER 主键才自增，本地 / 压测库上映射为 Integer，MySQL 仍为 BIGINT
+    click_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     paper_id = db.Column(db.Integer, db.ForeignKey('papers.paper_id'), nullable=False)
     college_id = db.Column(db.Integer, db.ForeignKey('colleges.college_id'), nullable=False)
@@ -138,7 +182,7 @@ class PaperClick(db.Model):
     
 
 # ===== 新增：论文相关模型 =====
-class Paper(db.Model):
+class Paper(db.Model, SoftDeleteMixin):
     __tablename__ = 'papers'
     
     paper_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -166,5 +210,29 @@ class Paper(db.Model):
             "doi": self.doi,
             "abstract": self.abstract,
             "pdf_url": self.pdf_url,
-            "category": self.category.to_dict() if self.category else None,
-        }
\ No newline at end of file
+            "category": _cached_category(self),
+        }
+
+
+# ===== 关键词（词云）=====
+class Keyword(db.Model):
+    __tablename__ = 'keywords'
+
+    keyword_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    word = db.Column(db.String(100), nullable=False, unique=True)
+    # 由 triggers.sql 在 paper_keywords 增删时维护
+    total_count = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            "keyword_id": self.keyword_id,
+            "word": self.word,
+            "total_count": self.total_count
+        }
+
+
+class PaperKeyword(db.Model):
+    __tablename__ = 'paper_keywords'
+
+    paper_id = db.Column(db.Integer, db.ForeignKey('papers.paper_id', ondelete='CASCADE'), primary_key=True)
+    keyword_id = db.Column(db.Integer, db.ForeignKey('keywords.keyword_id', ondelete='CASCADE'), primary_key=True)
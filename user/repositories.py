@@ -1,11 +1,17 @@
 # user/repositories.py
+import logging
 from datetime import date
 from .models import User, Role, College, UserTask, db
 
 #**********新增代码********
 from .models import Paper, Category
+from common.reference_data import reference_data
 from sqlalchemy import and_, or_, func
+from common.db_routing import read_only
+from common.auth_token import revoke_user
+from common.password_hashing import password_hasher, PasswordHashBusy
 
+logger = logging.getLogger(__name__)
 
 
 class UserTaskRepository:
@@ -29,20 +35,20 @@ class UserTaskRepository:
         return task
 
     @staticmethod
-    def update_task(task_id: int, data: dict):
-        task = UserTask.query.get(task_id)
+    def update_task(task_id: int, data: dict, user_id: int):
+        task = UserTask.query.filter_by(task_id=task_id, user_id=user_id).first()
         if not task:
             return None
         for key, value in data.items():
-            if hasattr(task, key):
+            if hasattr(task, key) and key not in ('task_id', 'user_id'):
                 setattr(task, key, value)
         # 自动更新 updated_at（如果模型中用了 default + onupdate）
         db.session.commit()
         return task
 
     @staticmethod
-    def complete_task(task_id: int):
-        task = UserTask.query.get(task_id)
+    def complete_task(task_id: int, user_id: int):
+        task = UserTask.query.filter_by(task_id=task_id, user_id=user_id).first()
         if not task:
             return None
         task.status = 'completed'
@@ -50,8 +56,8 @@ class UserTaskRepository:
         return task
 
     @staticmethod
-    def delete_task(task_id: int):
-        task = UserTask.query.get(task_id)
+    def delete_task(task_id: int, user_id: int):
+        task = UserTask.query.filter_by(task_id=task_id, user_id=user_id).first()
         if not task:
             return False
         db.session.delete(task)
@@ -80,15 +86,36 @@ class UserTaskRepository:
 def get_user_by_username(username: str) -> User | None:
     return User.query.filter_by(username=username).first()
 
+def authenticate_user(username: str, password: str) -> User | None:
+    """校验用户名密码，成功后把旧的明文 / 低成本哈希升级为当前配置的哈希"""
+    user = get_user_by_username(username)
+    if not user:
+        password_hasher.burn(password)
+        return None
+    if not user.check_password(password):
+        return None
+
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except PasswordHashBusy:
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"升级用户[{user.user_id}]密码哈希失败: {e}")
+    return user
+
 def get_all_colleges():
-    colleges = College.query.all()
-    return [c.to_dict() for c in colleges]
+    return reference_data.colleges()
 
-def get_college_by_id(college_id: int) -> College | None:
-    return College.query.get(college_id)
+def get_college_by_id(college_id: int) -> dict | None:
+    """学院字典（参考数据缓存），不存在返回 None"""
+    return reference_data.college(college_id)
 
 def username_exists(username: str) -> bool:
-    return User.query.filter_by(username=username).first() is not None
+    # 已软删除但尚未清理的用户仍占用用户名
+    return User.query.execution_options(include_deleted=True).filter_by(username=username).first() is not None
 
 def create_user(username: str, password: str, real_name: str, role: str, college_id: int) -> int:
     """创建用户并返回 user_id"""
@@ -125,7 +152,8 @@ def update_username(user_id, new_username):
         return False, "用户不存在"
 
     # 检查新用户名是否已被他人使用
-    existing = User.query.filter(User.username == new_username, User.user_id != user_id).first()
+    existing = User.query.execution_options(include_deleted=True).filter(
+        User.username == new_username, User.user_id != user_id).first()
     if existing:
         return False, "用户名已存在"
 
@@ -149,6 +177,7 @@ def update_password(user_id, old_password, new_password):
     try:
         user.set_password(new_password)
         db.session.commit()
+        revoke_user(user_id)
         return True, "密码修改成功"
     except Exception as e:
         db.session.rollback()
@@ -160,6 +189,7 @@ def update_password(user_id, old_password, new_password):
 
 #**********新增代码********
 # ===== 论文搜索相关函数 =====
+@read_only
 def search_papers_by_params(search_params):
     """
     根据搜索参数查询论文
@@ -3,12 +3,15 @@ import re
 from datetime import datetime  
 from flask import Blueprint, render_template, request, jsonify, current_app
 from .models import User, Role
-from .repositories import get_college_by_id, username_exists, create_user , get_user_by_username, get_all_colleges, UserTaskRepository, get_user_by_id, update_username as change_username, update_password as change_password
+from .repositories import get_college_by_id, username_exists, create_user , get_user_by_username, authenticate_user, get_all_colleges, UserTaskRepository, get_user_by_id, update_username as change_username, update_password as change_password
 
 #****新增代码*******
 from .repositories import search_papers_by_params, get_paper_with_authors
 from .models import College, db, Paper,db, PaperClick
 from datetime import timedelta
+from common.auth_token import issue_token, require_identity
+from common.password_hashing import PasswordHashBusy
+from common.reference_data import reference_data, conditional_response
 
 blueprint = Blueprint("user", __name__, url_prefix="/user")
 # ===== 1.学院列表 API =====
@@ -16,11 +19,12 @@ blueprint = Blueprint("user", __name__, url_prefix="/user")
 def colleges_api():
     try:
         colleges = get_all_colleges()
-        return jsonify({
+        response = jsonify({
             "code": 200,
             "message": "获取学院列表成功",
             "data": colleges
-        }), 200
+        })
+        return conditional_response(response, reference_data.snapshot().college_etag)
     except Exception as e:
         current_app.logger.error(f"获取学院失败: {e}")
         return jsonify({
@@ -47,8 +51,15 @@ def login_api():
             "message": "用户名和密码不能为空"
         }), 400
 
-    user = get_user_by_username(username)
-    if user and user.check_password(password):
+    try:
+        user = authenticate_user(username, password)
+    except PasswordHashBusy:
+        return jsonify({
+            "code": 503,
+            "message": "登录请求过多，请稍后重试"
+        }), 503
+
+    if user:
 
         # 统一跳转到 HomeView 由前端处理具体页面
         redirect_path = "/user/HomeView" 
@@ -61,7 +72,9 @@ def login_api():
                 "username": user.username,
                 "real_name": user.real_name,
                 "role": user.role.value,
-                "college_id": user.college_id
+                "college_id": user.college_id,
+                # 后续请求放在 Authorization: Bearer <token> 中，服务端校验签名即可识别身份
+                "token": issue_token(user)
             },
             "redirect": redirect_path
         }), 200
@@ -126,12 +139,10 @@ def register_api():
 
 # ===== 1. 获取用户所有任务（表格用）=====
 @blueprint.route("/api/tasks", methods=["GET"])
-def get_user_tasks():
-    user_id = request.args.get('user_id')  # 前端传 user_id，或从 token 解析
-    if not user_id:
-        return jsonify({'code': 400, 'message': '缺少 user_id'}), 400
-
-    tasks = UserTaskRepository.get_all_tasks(user_id)
+@require_identity()
+def get_user_tasks(identity):
+    # 用户取自令牌，不再信任前端传的 user_id
+    tasks = UserTaskRepository.get_all_tasks(identity.user_id)
     return jsonify({
         'code': 200,
         'message': 'success',
@@ -140,12 +151,9 @@ def get_user_tasks():
 
 # ===== 获取单个任务详情 =====
 @blueprint.route("/api/tasks/<int:task_id>", methods=["GET"])
-def get_task_detail(task_id):
-    user_id = request.args.get('user_id')
-    if not user_id:
-        return jsonify({'code': 400, 'message': '缺少 user_id'}), 400
-
-    task = UserTaskRepository.get_task_by_id(task_id, user_id)
+@require_identity()
+def get_task_detail(identity, task_id):
+    task = UserTaskRepository.get_task_by_id(task_id, identity.user_id)
     if not task:
         return jsonify({'code': 404, 'message': '任务不存在或无权访问'}), 404
 
@@ -155,9 +163,12 @@ def get_task_detail(task_id):
     })
 # ===== 2. 创建新任务 =====
 @blueprint.route("/api/tasks/create", methods=["POST"])
-def create_task():
+@require_identity()
+def create_task(identity):
     data = request.get_json()
-    required_fields = ['user_id', 'scheduled_date', 'title']
+    if not data:
+        return jsonify({'code': 400, 'message': '请求体必须是 JSON'}), 400
+    required_fields = ['scheduled_date', 'title']
     for field in required_fields:
         if field not in data:
             return jsonify({'code': 400, 'message': f'缺少必填字段: {field}'}), 400
@@ -168,7 +179,7 @@ def create_task():
         return jsonify({'code': 400, 'message': '日期格式错误'}), 400
 
     task = UserTaskRepository.create_task(
-        user_id=data['user_id'],
+        user_id=identity.user_id,
         data={
             'scheduled_date': scheduled_date,
             'title': data['title'],
@@ -186,9 +197,10 @@ def create_task():
 
 # ===== 3. 更新任务 =====
 @blueprint.route("/api/tasks/<int:task_id>/update", methods=["PUT"])
-def update_task(task_id):
-    data = request.get_json()
-    task = UserTaskRepository.update_task(task_id, data)
+@require_identity()
+def update_task(identity, task_id):
+    data = request.get_json() or {}
+    task = UserTaskRepository.update_task(task_id, data, identity.user_id)
     if not task:
         return jsonify({'code': 404, 'message': '任务不存在'}), 404
     return jsonify({
@@ -199,8 +211,9 @@ def update_task(task_id):
 
 # ===== 4. 完成任务 =====
 @blueprint.route("/api/tasks/<int:task_id>/complete", methods=["PUT"])
-def complete_task(task_id):
-    task = UserTaskRepository.complete_task(task_id)
+@require_identity()
+def complete_task(identity, task_id):
+    task = UserTaskRepository.complete_task(task_id, identity.user_id)
     if not task:
         return jsonify({'code': 404, 'message': '任务不存在'}), 404
     return jsonify({
@@ -211,8 +224,9 @@ def complete_task(task_id):
 
 # ===== 5. 删除任务 =====
 @blueprint.route("/api/tasks/<int:task_id>/delete", methods=["DELETE"])
-def delete_task(task_id):
-    success = UserTaskRepository.delete_task(task_id)
+@require_identity()
+def delete_task(identity, task_id):
+    success = UserTaskRepository.delete_task(task_id, identity.user_id)
     if not success:
         return jsonify({'code': 404, 'message': '任务不存在'}), 404
     return jsonify({
@@ -222,12 +236,12 @@ def delete_task(task_id):
 
 # ===== 6. 日历事件接口 =====
 @blueprint.route("/api/tasks/calendar/", methods=["GET"])
-def get_calendar_events():
-    user_id = request.args.get('user_id')
+@require_identity()
+def get_calendar_events(identity):
     start_str = request.args.get('start')
     end_str = request.args.get('end')
 
-    if not user_id or not start_str or not end_str:
+    if not start_str or not end_str:
         return jsonify({'code': 400, 'message': '缺少参数'}), 400
 
     try:
@@ -236,7 +250,7 @@ def get_calendar_events():
     except Exception:
         return jsonify({'code': 400, 'message': '日期格式错误'}), 400
 
-    tasks = UserTaskRepository.get_calendar_events(user_id, start_date, end_date)
+    tasks = UserTaskRepository.get_calendar_events(identity.user_id, start_date, end_date)
 
     events = []
     for task in tasks:
@@ -269,7 +283,8 @@ def get_priority_color(priority):
 
 # ===== 修改用户名 API =====
 @blueprint.route("/api/update-username", methods=["PUT"])
-def update_username_api():
+@require_identity()
+def update_username_api(identity):
     data = request.get_json()
     if not data:
         return jsonify({
@@ -277,15 +292,9 @@ def update_username_api():
             "message": "请求体必须是 JSON"
         }), 400
 
-    user_id = data.get("user_id")
+    user_id = identity.user_id
     new_username = data.get("new_username", "").strip()
 
-    if not user_id or not isinstance(user_id, int):
-        return jsonify({
-            "code": 400,
-            "message": "缺少有效的 user_id"
-        }), 400
-
     if not new_username:
         return jsonify({
             "code": 400,
@@ -316,7 +325,8 @@ def update_username_api():
 
 # ===== 修改密码 API =====
 @blueprint.route("/api/change-password", methods=["PUT"])
-def change_password_api():
+@require_identity()
+def change_password_api(identity):
     data = request.get_json()
     if not data:
         return jsonify({
@@ -324,16 +334,10 @@ def change_password_api():
             "message": "请求体必须是 JSON"
         }), 400
 
-    user_id = data.get("user_id")
+    user_id = identity.user_id
     old_password = data.get("old_password", "")
     new_password = data.get("new_password", "")
 
-    if not user_id or not isinstance(user_id, int):
-        return jsonify({
-            "code": 400,
-            "message": "缺少有效的 user_id"
-        }), 400
-
     if not old_password or not new_password:
         return jsonify({
             "code": 400,
@@ -467,7 +471,8 @@ def get_paper_detail(paper_id):
 
 
 @blueprint.route("/api/record-paper-click", methods=["POST"])
-def record_paper_click():
+@require_identity()
+def record_paper_click(identity):
     """
     记录用户点击论文的行为 - 完全避免时区问题的版本
     """
@@ -478,27 +483,22 @@ def record_paper_click():
         if not data:
             return jsonify({"success": False, "message": "请求数据不能为空"}), 400
         
-        user_id = data.get('user_id')
+        # 用户和学院取自令牌（已删除的用户令牌会被吊销），不再查 users 表
+        user_id = identity.user_id
         paper_id = data.get('paper_id')
-        college_id = data.get('college_id')
+        college_id = data.get('college_id', identity.college_id)
         
-        if not all([user_id, paper_id, college_id]):
-            return jsonify({"success": False, "message": "user_id、paper_id 和 college_id 为必填参数"}), 400
-        
-        # 验证数据存在性
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"success": False, "message": "用户不存在"}), 404
+        if not paper_id:
+            return jsonify({"success": False, "message": "paper_id 为必填参数"}), 400
         
         paper = Paper.query.get(paper_id)
         if not paper:
             return jsonify({"success": False, "message": "论文不存在"}), 404
         
-        college = College.query.get(college_id)
-        if not college:
+        if reference_data.college(college_id) is None:
             return jsonify({"success": False, "message": "学院不存在"}), 404
         
-        if user.college_id != college_id:
+        if identity.college_id != college_id:
             return jsonify({"success": False, "message": "用户不属于指定的学院"}), 400
         
         # 完全忽略前端发送的时间，始终使用服务器当前时间